@@ -0,0 +1,30 @@
+"""Benchmark the demosaic tiers on a 12 MP (IMX477 sized) 12 bit mosaic.
+
+Run from the repository root with ``python -m benchmarks.bench_demosaic``.
+"""
+import timeit
+
+import numpy as np
+
+from scicamera.demosaic import DEMOSAIC_METHODS, demosaic
+
+SHAPE = (3040, 4056)
+BAYER_ORDER = "BGGR"
+N_REPEATS = 5
+
+
+def main():
+    mosaic = np.random.default_rng(0).integers(0, 4096, SHAPE, dtype=np.uint16)
+    print(f"{SHAPE[1]}x{SHAPE[0]} {BAYER_ORDER} uint16 mosaic")
+    for method in DEMOSAIC_METHODS:
+        out = demosaic(mosaic, BAYER_ORDER, method=method)
+
+        def call():
+            demosaic(mosaic, BAYER_ORDER, method=method, out=out, max_value=4095)
+
+        seconds = min(timeit.repeat(call, number=1, repeat=N_REPEATS))
+        print(f"  {method:<12} {seconds * 1000:8.1f} ms  -> {out.shape}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Benchmark runloop handoff latency on the FakeCamera.
+
+Measures how long request-less loop tasks (as used by ``stop`` and ``switch_mode``)
+take to run once dispatched, how long a capture takes to mature, and how long
+``stop`` takes. Run from the repository root with ``python -m benchmarks.bench_runloop``.
+"""
+import statistics
+import time
+
+from scicamera.fake import FakeCamera
+from scicamera.request import LoopTask
+
+N_REPEATS = 50
+
+
+def _milliseconds(samples):
+    samples = sorted(samples)
+    return (
+        f"median {statistics.median(samples) * 1000:7.2f} ms  "
+        f"max {samples[-1] * 1000:7.2f} ms"
+    )
+
+
+def main():
+    with FakeCamera() as camera:
+        camera.start()
+        camera.capture_metadata().result()
+
+        task_latency = []
+        for _ in range(N_REPEATS):
+            start = time.perf_counter()
+            camera._dispatch_loop_tasks(LoopTask.without_request(lambda: None))[
+                0
+            ].result()
+            task_latency.append(time.perf_counter() - start)
+
+        capture_latency = []
+        for _ in range(N_REPEATS // 5):
+            start = time.perf_counter()
+            camera.capture_metadata().result()
+            capture_latency.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        camera.stop()
+        stop_latency = time.perf_counter() - start
+
+    print(f"request-less task  {_milliseconds(task_latency)}")
+    print(f"capture_metadata   {_milliseconds(capture_latency)}")
+    print(f"stop               {stop_latency * 1000:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Benchmark raw unpacking of full resolution sensor frames.
+
+Run from the repository root with ``python -m benchmarks.bench_unpack``. Reports the time per frame for each
+format at 1 to 4 decode threads.
+"""
+import timeit
+from typing import Optional
+
+import numpy as np
+
+from scicamera.formats import SensorFormat, csi2p_stride, unpack_raw, unpack_raw_planes
+
+SENSORS = {
+    # name: (format, (height, width))
+    "imx477": ("SBGGR12_CSI2P", (3040, 4056)),
+    "imx219": ("SBGGR10_CSI2P", (2464, 3280)),
+}
+N_REPEATS = 10
+
+
+def bench(name: str, call, baseline: Optional[float] = None) -> float:
+    seconds = min(timeit.repeat(call, number=1, repeat=N_REPEATS))
+    speedup = f"{baseline / seconds:6.2f}x" if baseline else ""
+    print(f"  {name:<24} {seconds * 1000:8.2f} ms {speedup}")
+    return seconds
+
+
+def main():
+    for sensor, (fmt_string, shape) in SENSORS.items():
+        fmt = SensorFormat(fmt_string)
+        stride = csi2p_stride(shape[1], fmt.bit_depth)
+        raw = np.random.default_rng(0).integers(
+            0, 256, stride * shape[0], dtype=np.uint8
+        )
+        out = np.empty(shape, dtype=np.uint16)
+        planes = np.empty((4, shape[0] // 2, shape[1] // 2), dtype=np.uint16)
+
+        print(f"{sensor} {fmt} {shape[1]}x{shape[0]}")
+        baseline = None
+        for workers in (1, 2, 3, 4):
+            seconds = bench(
+                f"unpack_raw workers={workers}",
+                lambda: unpack_raw(raw, shape, fmt, stride, out=out, workers=workers),
+                baseline,
+            )
+            baseline = baseline or seconds
+        for workers in (1, 4):
+            bench(
+                f"planes workers={workers}",
+                lambda: unpack_raw_planes(
+                    raw, shape, fmt, stride, out=planes, workers=workers
+                ),
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""Benchmark YUV420 to RGB conversion of a 1080p frame.
+
+Run from the repository root with ``python -m benchmarks.bench_yuv``.
+"""
+import os
+import timeit
+
+import numpy as np
+
+from scicamera.converters import YUV420_to_RGB, YUV420_to_RGB_full
+
+SIZE = (1920, 1080)
+N_REPEATS = 5
+
+
+def main():
+    w, h = SIZE
+    buffer = np.random.default_rng(0).integers(0, 256, w * h * 3 // 2, dtype=np.uint8)
+    print(f"{w}x{h} YUV420")
+
+    seconds = min(timeit.repeat(lambda: YUV420_to_RGB(buffer, SIZE), number=1))
+    print(f"  {'half resolution':<24} {seconds * 1000:8.1f} ms")
+
+    out = np.empty((h, w, 3), dtype=np.uint8)
+    for workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+
+        def call():
+            YUV420_to_RGB_full(buffer, SIZE, out=out, workers=workers)
+
+        seconds = min(timeit.repeat(call, number=1, repeat=N_REPEATS))
+        label = f"full resolution x{workers}"
+        print(f"  {label:<24} {seconds * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
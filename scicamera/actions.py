@@ -1,28 +1,113 @@
+import asyncio
 from abc import ABC, abstractmethod
 from collections import deque
-from concurrent.futures import Future
+from concurrent.futures import Future, ThreadPoolExecutor
 from logging import getLogger
-from threading import Condition, Event, Thread
-from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+from threading import Condition, Event, Lock, RLock, Thread
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+from weakref import WeakSet
 
 import numpy as np
 from PIL import Image
 
+from scicamera.array_pool import ArrayPool
+from scicamera.callbacks import CallbackStats, RequestCallback
 from scicamera.configuration import CameraConfig
-from scicamera.frame import CameraFrame
+from scicamera.frame import BURST_METADATA, CameraBurst, CameraFrame
 from scicamera.request import CompletedRequest, LoopTask
+from scicamera.sequence import FrameSequence
+from scicamera.stream import FrameStream
 from scicamera.typing import TypedFuture
 
 _log = getLogger(__name__)
 
 
+def _copy_future_state(source: Future, destination: asyncio.Future) -> None:
+    if destination.cancelled():
+        return
+    if source.exception() is not None:
+        destination.set_exception(source.exception())
+    else:
+        destination.set_result(source.result())
+
+
+def _to_asyncio(future: Future) -> asyncio.Future:
+    """An asyncio future of the running loop, completed along with ``future``.
+
+    The runloop completes it with ``call_soon_threadsafe``, so waiting on it needs no
+    thread of its own (unlike ``run_in_executor``).
+    """
+    loop = asyncio.get_running_loop()
+    result = loop.create_future()
+    future.add_done_callback(
+        lambda f: loop.call_soon_threadsafe(_copy_future_state, f, result)
+    )
+    return result
+
+
+class _BurstCapture:
+    """Fills a ``CameraBurst`` a frame at a time, maturing ``future`` once every
+    frame is in (or with the first error, once every frame has been tried)."""
+
+    def __init__(self, n_frames: int, name: str, metadata_keys: Sequence[str]):
+        self.n_frames = n_frames
+        self.name = name
+        self.metadata_keys = metadata_keys
+        self.future: TypedFuture[CameraBurst] = Future()
+        self._burst: Optional[CameraBurst] = None
+        self._remaining = n_frames
+        self._error: Optional[BaseException] = None
+        self._lock = Lock()
+
+    def fill(self, index: int, request: CompletedRequest) -> None:
+        with self._lock:
+            if self._burst is None:
+                self._burst = CameraBurst.empty(
+                    self.n_frames, request, self.name, self.metadata_keys
+                )
+        self._burst.fill(index, request, self.name)
+
+    def frame_done(self, future: Future) -> None:
+        with self._lock:
+            if self._error is None:
+                self._error = future.exception()
+            self._remaining -= 1
+            if self._remaining:
+                return
+        if self._error is not None:
+            self.future.set_exception(self._error)
+        else:
+            self.future.set_result(self._burst)
+
+
 class RequestMachinery(ABC):
     """RequestMachinery is a helper class for the Camera class."""
 
-    def __init__(self) -> None:
+    def __init__(self, array_alignment: Optional[int] = None) -> None:
         self._requests: Deque[CompletedRequest] = deque()
-        self._request_callbacks: List[Callable[[CompletedRequest], None]] = []
+        self._request_callbacks: List[RequestCallback] = []
+        self._streams: WeakSet[FrameStream] = WeakSet()
         self._task_deque: Deque[LoopTask] = deque()
+        self.array_pool = ArrayPool(array_alignment)
+        self.frame_sequence = FrameSequence()
+
+        self._task_pool: Optional[ThreadPoolExecutor] = None
+        self._offloaded: Deque[Tuple[LoopTask, Future]] = deque()
+        # Notified when the last offloaded task has matured
+        self._offloaded_cond = Condition()
+        self._maturing_lock = Lock()
+        # Held while tasks are handed out, so the pool isn't swapped from under them
+        self._task_pool_lock = RLock()
 
         self._runloop_cond = Condition()
         self._runloop_abort = Event()
@@ -40,41 +125,101 @@ class RequestMachinery(ABC):
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
 
-    def add_request_callback(self, callback: Callable[[CompletedRequest], None]):
+    def add_request_callback(
+        self,
+        callback: Callable[[CompletedRequest], None],
+        worker: bool = False,
+        max_concurrency: int = 1,
+        skip_if_busy: bool = False,
+    ):
         """Add a callback to be called when every request completes.
 
         Note that the request is only valid within the callback, and will be
         deallocated after the callback returns.
 
+        By default the callback runs on the runloop, so it holds up every other
+        callback (and task) while it runs. With ``worker`` it runs on threads of its
+        own instead, on up to ``max_concurrency`` frames at once; frames arriving while
+        it is that busy are queued, holding their buffers, or with ``skip_if_busy``
+        skipped. See ``request_callback_stats`` for how it keeps up.
+
         :param callback: The callback to be called
         :type callback: Callable[[CompletedRequest], None]
+        :param worker: Whether to run the callback off the runloop
+        :type worker: bool
+        :param max_concurrency: How many frames a worker callback may run on at once
+        :type max_concurrency: int
+        :param skip_if_busy: Whether a worker callback skips frames when busy
+        :type skip_if_busy: bool
         """
-        self._request_callbacks.append(callback)
+        self._request_callbacks.append(
+            RequestCallback(callback, worker, max_concurrency, skip_if_busy)
+        )
+
+    def _find_request_callback(
+        self, callback: Callable[[CompletedRequest], None]
+    ) -> RequestCallback:
+        for runner in self._request_callbacks:
+            if runner.callback == callback:
+                return runner
+        raise ValueError(f"{callback} is not a request callback")
 
     def remove_request_callback(self, callback: Callable[[CompletedRequest], None]):
-        """Remove a callback previously added with add_request_callback.
+        """Remove a callback previously added with add_request_callback. Frames it
+        already has on a worker are still processed.
 
         :param callback: The callback to be removed
         :type callback: Callable[[CompletedRequest], None]
         """
-        self._request_callbacks.remove(callback)
+        runner = self._find_request_callback(callback)
+        self._request_callbacks.remove(runner)
+        runner.close()
+
+    def _finish_request_callbacks(self) -> None:
+        """Wait for the worker callbacks to finish with their frames, which they must
+        before the camera's buffers are freed. They take no more frames after this."""
+        for runner in self._request_callbacks:
+            runner.close(wait=True)
+
+    def request_callback_stats(
+        self, callback: Callable[[CompletedRequest], None]
+    ) -> CallbackStats:
+        """The (live) CallbackStats of a request callback: how long it takes to run,
+        how often it takes longer than a frame, and how many frames it was too busy
+        for."""
+        return self._find_request_callback(callback).stats
 
     def add_completed_request(self, request: CompletedRequest) -> None:
-        self._requests.append(request)
-
         with self._runloop_cond:
+            self._requests.append(request)
             self._runloop_cond.notify()
 
+    def _has_runnable_task(self) -> bool:
+        """Whether the next task can run now, without waiting for a request (or for
+        the offloaded tasks before it)."""
+        return (
+            len(self._task_deque) > 0
+            and not self._task_deque[0].needs_request
+            and not self._offloaded
+        )
+
+    def _runloop_has_work(self) -> bool:
+        return (
+            self._runloop_abort.is_set()
+            or len(self._requests) > 0
+            or self._has_runnable_task()
+        )
+
     def _runloop(self) -> None:
         while True:
+            # Everything that makes work for the loop notifies, so no need to poll
             with self._runloop_cond:
-                self._runloop_cond.wait(timeout=0.05)
+                self._runloop_cond.wait_for(self._runloop_has_work)
 
             if self._runloop_abort.is_set():
                 break
 
-            if len(self._requests) > 0:
-                self.process_requests()
+            self.process_requests()
 
     def start_runloop(self) -> None:
         """
@@ -95,11 +240,83 @@ class RequestMachinery(ABC):
 
         :raises RuntimeError: Unable to stop preview
         """
+        self._close_streams()
         self._runloop_abort.set()
         with self._runloop_cond:
             self._runloop_cond.notify()
         self._runloop_thread.join()
 
+    def offload_tasks(self, workers: int) -> None:
+        """Run the tasks taking requests (captures, and their conversions and file I/O)
+        on a pool of ``workers`` threads rather than on the runloop, or on the runloop
+        again if ``workers`` is 0.
+
+        The runloop then only hands requests out, so a slow task (like saving a JPEG)
+        doesn't hold up the ones after it. Their futures still mature in frame order,
+        and each request is released as soon as its task is done. Request callbacks,
+        and tasks needing no request, still run on the runloop, the latter only once
+        the offloaded tasks before them are done (so e.g. the camera is not stopped or
+        reconfigured while frames from before are being converted).
+        """
+        pool = None
+        if workers > 0:
+            pool = ThreadPoolExecutor(workers, thread_name_prefix="scicamera-task")
+        with self._task_pool_lock:
+            pool, self._task_pool = self._task_pool, pool
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    def _offload(
+        self, pool: ThreadPoolExecutor, task: LoopTask, request: CompletedRequest
+    ) -> None:
+        request.acquire()
+
+        def run():
+            try:
+                return task.call(request)
+            finally:
+                request.release()
+
+        try:
+            result = pool.submit(run)
+        except Exception:
+            request.release()
+            raise
+        with self._offloaded_cond:
+            self._offloaded.append((task, result))
+        result.add_done_callback(self._mature_offloaded)
+
+    def _mature_offloaded(self, _: Future) -> None:
+        # Mature every finished task at the head of the queue, one thread at a time,
+        # so that futures mature in frame order. A task finishing after the head was
+        # checked gets its own call here, which runs once this one is done.
+        with self._maturing_lock:
+            while True:
+                with self._offloaded_cond:
+                    if not (self._offloaded and self._offloaded[0][1].done()):
+                        return
+                    task, result = self._offloaded[0]
+                if result.exception() is not None:
+                    e = result.exception()
+                    _log.warning(f"Error in LoopTask {task.call}: {e}")
+                    task.future.set_exception(e)
+                else:
+                    task.future.set_result(result.result())
+                # Only taken off the queue once matured, so that the tasks waiting for
+                # the queue to empty run after it
+                with self._offloaded_cond:
+                    self._offloaded.popleft()
+                    if self._offloaded:
+                        continue
+                    self._offloaded_cond.notify_all()
+                with self._runloop_cond:
+                    self._runloop_cond.notify_all()
+
+    def _wait_offloaded(self) -> None:
+        """Wait for every offloaded task to mature."""
+        with self._offloaded_cond:
+            self._offloaded_cond.wait_for(lambda: not self._offloaded)
+
     def has_requests(self) -> bool:
         return len(self._requests) > 0
 
@@ -109,15 +326,55 @@ class RequestMachinery(ABC):
         for _ in requests:
             self._requests.popleft()
 
+        # Requests are handed over in order, so each is counted against the one before
+        for request in requests:
+            self._count_frame(request)
+
+        # Tasks which need no request run straight away (once no offloaded tasks are
+        # left before them), the rest take a request each
+        with self._task_pool_lock:
+            self._run_tasks(requests)
+
+        for request in requests:
+            # Errors in the callbacks are caught (and logged) by their runners
+            for runner in list(self._request_callbacks):
+                runner(request)
+
+        for req in requests:
+            req.release()
+
+    def _count_frame(self, request: CompletedRequest) -> None:
+        metadata = request.metadata
+        dropped_before = self.frame_sequence.update(
+            metadata.get("SensorTimestamp"),
+            metadata.get("FrameDuration"),
+            request.sequence,
+        )
+        request._add_metadata("dropped_before", dropped_before)
+
+    def _run_tasks(self, requests: List[CompletedRequest]) -> None:
         req_idx = 0
-        while len(self._task_deque) and (req_idx < len(requests)):
+        while len(self._task_deque):
+            if self._task_deque[0].needs_request:
+                if req_idx == len(requests):
+                    break
+            elif self._offloaded:
+                # Left at the head of the queue, for the runloop to be woken for it
+                break
             task = self._task_deque.popleft()
             _log.debug(f"Begin LoopTask Execution: {task.call}")
             try:
                 if task.needs_request:
                     req = requests[req_idx]
                     req_idx += 1
-                    task.future.set_result(task.call(req))
+                    # Read for each task, as a task may change it
+                    pool = self._task_pool
+                    if pool is not None:
+                        self._offload(pool, task, req)
+                    else:
+                        # Only when the pool was just removed can tasks be left on it
+                        self._wait_offloaded()
+                        task.future.set_result(task.call(req))
                 else:
                     task.future.set_result(task.call())
             except Exception as e:
@@ -125,16 +382,6 @@ class RequestMachinery(ABC):
                 task.future.set_exception(e)
             _log.debug(f"End LoopTask Execution: {task.call}")
 
-        for request in requests:
-            for callback in self._request_callbacks:
-                try:
-                    callback(request)
-                except Exception as e:
-                    _log.error(f"Error in request callback ({callback}): {e}")
-
-        for req in requests:
-            req.release()
-
     def _dispatch_loop_tasks(
         self, *args: LoopTask, config: Optional[dict] = None
     ) -> List[Future]:
@@ -160,7 +407,9 @@ class RequestMachinery(ABC):
                     LoopTask.without_request(self._switch_mode, previous_config),
                 ]
             )
-        self._task_deque.extend(tasks)
+        with self._runloop_cond:
+            self._task_deque.extend(tasks)
+            self._runloop_cond.notify()
         # Note that the below strips the config changes
         return [task.future for task in args]
 
@@ -246,15 +495,40 @@ class RequestMachinery(ABC):
         )[0]
 
     # Array Capture Methods
-    def _capture_array(self, name: str, request: CompletedRequest):
-        return request.make_array(name)
+    def _capture_array(
+        self, name: str, pooled: bool, shared: bool, request: CompletedRequest
+    ):
+        if shared:
+            return request.get_shared("array", name)
+        if not pooled:
+            return request.make_array(name)
+        out = self.array_pool.acquire(name)
+        try:
+            return request.make_array(name, out=out)
+        except Exception:
+            self.array_pool.release(out)
+            raise
 
     def capture_array(
-        self, name: str = "main", config: Optional[dict] = None
+        self,
+        name: str = "main",
+        config: Optional[dict] = None,
+        pooled: bool = False,
+        shared: bool = False,
     ) -> Future[np.ndarray]:
-        """Make a 2d image from the next frame in the named stream."""
+        """Make a 2d image from the next frame in the named stream.
+
+        With ``pooled`` the image is written to an array from ``self.array_pool``,
+        which should be given back with ``self.array_pool.release`` when done with.
+        Pooled arrays are aligned to the camera's ``array_alignment``, if given.
+        With ``shared`` it is the read-only array of ``request.get_shared``, made only
+        once for this and any request callbacks asking for the same.
+        """
+        if pooled and shared:
+            raise ValueError("An array can not be both pooled and shared")
         return self._dispatch_loop_tasks(
-            LoopTask.with_request(self._capture_array, name), config=config
+            LoopTask.with_request(self._capture_array, name, pooled, shared),
+            config=config,
         )[0]
 
     def _capture_arrays_and_metadata(
@@ -307,6 +581,24 @@ class RequestMachinery(ABC):
             LoopTask.with_request(self._capture_frame, name), config=config
         )[0]
 
+    def capture_burst(
+        self,
+        n_frames: int,
+        name: str = "main",
+        metadata_keys: Sequence[str] = BURST_METADATA,
+    ) -> TypedFuture[CameraBurst]:
+        """Capture the next ``n_frames`` of the named stream into one preallocated
+        stack, with their metadata as columns (see ``CameraBurst``)."""
+        if n_frames < 1:
+            raise ValueError(f"A burst needs at least one frame, not {n_frames}")
+        burst = _BurstCapture(n_frames, name, metadata_keys)
+        futures = self._dispatch_loop_tasks(
+            *(LoopTask.with_request(burst.fill, i) for i in range(n_frames))
+        )
+        for future in futures:
+            future.add_done_callback(burst.frame_done)
+        return burst.future
+
     def capture_serial_frames(
         self, n_frames: int, name: str = "main"
     ) -> List[TypedFuture[CameraFrame]]:
@@ -314,3 +606,86 @@ class RequestMachinery(ABC):
         return self._dispatch_loop_tasks(
             *(LoopTask.with_request(self._capture_frame, name) for _ in range(n_frames))
         )
+
+    def stream(
+        self,
+        name: str = "main",
+        maxsize: int = 4,
+        policy: str = "drop_oldest",
+        timeout: Optional[float] = None,
+    ) -> FrameStream:
+        """Iterate over every frame of the named stream from now on, as CameraFrames.
+
+        Up to ``maxsize`` frames are queued for the consumer, and when it falls behind
+        the ``policy`` says which to drop (see ``scicamera.stream``). Close the stream
+        (or use it as a context manager) to stop it. It is also closed when the camera
+        is stopped or closed, so a blocking stream nobody reads can't hang those.
+        """
+        stream = FrameStream(self, name, maxsize, policy, timeout)
+        self._streams.add(stream)
+        return stream
+
+    def _close_streams(self) -> None:
+        """Close the streams from ``stream``, unblocking the runloop if it is waiting
+        for room in one."""
+        for stream in list(self._streams):
+            stream.close()
+
+    # asyncio versions of the capture methods, for use from a running event loop
+    async def capture_array_async(
+        self, name: str = "main", config: Optional[dict] = None
+    ) -> np.ndarray:
+        """Await a 2d image from the next frame in the named stream."""
+        return await _to_asyncio(self.capture_array(name, config=config))
+
+    async def capture_image_async(
+        self, name: str = "main", config: Optional[dict] = None
+    ) -> Image.Image:
+        """Await a PIL image from the next frame in the named stream."""
+        return await _to_asyncio(self.capture_image(name, config=config))
+
+    async def capture_metadata_async(
+        self, config: Optional[dict] = None
+    ) -> Dict[str, Any]:
+        """Await the metadata of the next frame."""
+        return await _to_asyncio(self.capture_metadata(config=config))
+
+    async def capture_frame_async(
+        self, name: str = "main", config: Optional[dict] = None
+    ) -> CameraFrame:
+        """Await a CameraFrame from the next frame in the named stream."""
+        return await _to_asyncio(self.capture_frame(name, config=config))
+
+    async def frames(
+        self, name: str = "main", maxsize: int = 4
+    ) -> AsyncIterator[CameraFrame]:
+        """Iterate over every frame of the named stream from now on, as CameraFrames.
+
+        Frames are made on the runloop and handed to the event loop, queueing up to
+        ``maxsize`` of them; beyond that the oldest are dropped. Frames stop being made
+        once the iterator is closed, so close it when done with it::
+
+            frames = camera.frames("main")
+            try:
+                async for frame in frames:
+                    ...
+            finally:
+                await frames.aclose()
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue[CameraFrame] = asyncio.Queue(maxsize)
+
+        def put(frame: CameraFrame) -> None:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(frame)
+
+        def callback(request: CompletedRequest) -> None:
+            loop.call_soon_threadsafe(put, CameraFrame.from_request(name, request))
+
+        self.add_request_callback(callback)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self.remove_request_callback(callback)
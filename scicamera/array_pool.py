@@ -0,0 +1,152 @@
+"""
+Reusable output arrays for ``make_array`` and ``capture_array``.
+
+Making an array of every frame allocates (and frees) a full frame of memory each time,
+which at video rates is hundreds of MB/s through the allocator. An ``ArrayPool`` works
+out the shape and dtype of the arrays of each stream when the camera is configured, and
+hands out arrays of that shape which are returned to it to be reused::
+
+    frame = camera.capture_array("main", pooled=True).result()
+    with camera.array_pool.lease(frame):
+        process(frame)
+
+Arrays may optionally be aligned to e.g. 64 bytes, to suit SIMD code working on them.
+"""
+from __future__ import annotations
+
+import threading
+import weakref
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from scicamera import formats
+from scicamera.configuration import CameraConfig, StreamConfig
+from scicamera.sensor_format import SensorFormat
+
+ArraySpec = Tuple[Tuple[int, ...], np.dtype]
+
+STREAM_NAMES = ("main", "lores", "raw")
+
+
+def array_spec(stream_config: StreamConfig) -> Optional[ArraySpec]:
+    """The shape and dtype of ``make_array`` for a stream, or None if it cannot be
+    known in advance (as for MJPEG)."""
+    w, h = stream_config.size
+    stride = stream_config.stride
+    fmt = stream_config.format
+    if fmt in ("BGR888", "RGB888"):
+        return (h, w, 3), np.dtype(np.uint8)
+    if fmt in ("XBGR8888", "XRGB8888"):
+        return (h, w, 4), np.dtype(np.uint8)
+    if fmt in ("YUV420", "YVU420", "NV12", "NV21"):
+        return (h * 3 // 2, stride), np.dtype(np.uint8)
+    if fmt in ("YUYV", "YVYU", "UYVY", "VYUY"):
+        return (h, stride // 2, 2), np.dtype(np.uint8)
+    if formats.is_raw(fmt):
+        dtype = np.uint8 if SensorFormat(fmt).bit_depth == 8 else np.uint16
+        return (h, w), np.dtype(dtype)
+    return None
+
+
+def aligned_empty(
+    shape: Tuple[int, ...], dtype: np.dtype, alignment: Optional[int] = None
+) -> np.ndarray:
+    """Like ``np.empty``, but with the data starting on a multiple of ``alignment``
+    bytes."""
+    if not alignment:
+        return np.empty(shape, dtype=dtype)
+    dtype = np.dtype(dtype)
+    nbytes = int(np.prod(shape)) * dtype.itemsize
+    raw = np.empty(nbytes + alignment, dtype=np.uint8)
+    offset = -raw.ctypes.data % alignment
+    return raw[offset : offset + nbytes].view(dtype).reshape(shape)
+
+
+class ArrayPool:
+    """A pool of output arrays for each stream of the camera's configuration.
+
+    Arrays are allocated on demand, so the pool grows to the number of arrays in use
+    at once. Arrays made for an earlier configuration are dropped when released.
+    Arrays which are dropped without being released are just garbage collected.
+    """
+
+    def __init__(self, alignment: Optional[int] = None):
+        self.alignment = alignment
+        self._specs: Dict[str, ArraySpec] = {}
+        self._free: Dict[str, List[np.ndarray]] = defaultdict(list)
+        # The arrays handed out, by id, with their stream name (or None if made for an
+        # earlier configuration). Held weakly, and checked for identity, as ids are
+        # reused once an array is garbage collected.
+        self._owners: Dict[int, Tuple[weakref.ref, Optional[str]]] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, camera_config: Optional[CameraConfig]) -> None:
+        """Size the pool for a new configuration, dropping all the arrays it holds."""
+        specs = {}
+        if camera_config is not None:
+            for name in STREAM_NAMES:
+                stream_config = camera_config.get_stream_config(name)
+                if stream_config is None:
+                    continue
+                spec = array_spec(stream_config)
+                if spec is not None:
+                    specs[name] = spec
+        with self._lock:
+            self._specs = specs
+            self._free = defaultdict(list)
+            self._forget_collected()
+            for key, (ref, _) in self._owners.items():
+                self._owners[key] = (ref, None)
+
+    def spec(self, name: str) -> ArraySpec:
+        try:
+            return self._specs[name]
+        except KeyError:
+            raise ValueError(f"No pooled arrays for stream {name}") from None
+
+    def acquire(self, name: str) -> np.ndarray:
+        """Take an array for the named stream, allocating one if none are free."""
+        with self._lock:
+            shape, dtype = self.spec(name)
+            free = self._free[name]
+            if free:
+                array = free.pop()
+            else:
+                array = aligned_empty(shape, dtype, self.alignment)
+                self._forget_collected()
+            self._owners[id(array)] = (weakref.ref(array), name)
+            return array
+
+    def _forget_collected(self) -> None:
+        """Drop the arrays which were garbage collected instead of released."""
+        for key in [k for k, (ref, _) in self._owners.items() if ref() is None]:
+            del self._owners[key]
+
+    def release(self, array: np.ndarray) -> None:
+        """Give an array from ``acquire`` back to the pool, after which it may be
+        overwritten with another frame at any time.
+
+        :raises ValueError: The array is not one handed out by this pool (or has
+            already been released)
+        """
+        with self._lock:
+            ref, name = self._owners.get(id(array), (None, None))
+            if ref is None or ref() is not array:
+                raise ValueError("The array was not acquired from this pool")
+            del self._owners[id(array)]
+            if name is not None:
+                self._free[name].append(array)
+
+    @contextmanager
+    def lease(self, array: np.ndarray) -> Iterator[np.ndarray]:
+        """Context manager releasing a pooled array on exit."""
+        try:
+            yield array
+        finally:
+            self.release(array)
+
+    def n_free(self, name: str) -> int:
+        return len(self._free.get(name, ()))
@@ -0,0 +1,134 @@
+"""
+Running request callbacks, optionally isolated from the runloop.
+
+By default request callbacks run one after another on the runloop, holding the request
+(and its camera buffer) while they do, so a slow one holds up everything else. A
+callback added with ``worker=True`` instead gets threads of its own: the runloop just
+hands it the request, and up to ``max_concurrency`` frames are processed at once. With
+``skip_if_busy`` frames arriving while it is busy are skipped rather than queued, so a
+heavyweight callback drops frames while fast ones keep running at full rate.
+
+Every callback has ``CallbackStats`` of how long it takes, and how often it falls behind.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Callable, Optional
+
+from scicamera.request import CompletedRequest
+
+_log = getLogger(__name__)
+
+
+@dataclass
+class CallbackStats:
+    calls: int = 0
+    """The number of times the callback has run."""
+
+    total_time: float = 0.0
+    """The total time (in seconds) spent running the callback."""
+
+    max_time: float = 0.0
+    """The longest time (in seconds) a single run took."""
+
+    overruns: int = 0
+    """The number of runs which took longer than ``max_concurrency`` frames (by their
+    ``FrameDuration``), i.e. at a rate the callback couldn't keep up with."""
+
+    busy: int = 0
+    """The number of frames arriving with ``max_concurrency`` runs still going."""
+
+    skipped: int = 0
+    """The number of those frames skipped (with ``skip_if_busy``) rather than queued."""
+
+    @property
+    def mean_time(self) -> float:
+        return self.total_time / self.calls if self.calls else 0.0
+
+
+class RequestCallback:
+    """A request callback, with how (and where) to run it and its ``stats``."""
+
+    def __init__(
+        self,
+        callback: Callable[[CompletedRequest], None],
+        worker: bool = False,
+        max_concurrency: int = 1,
+        skip_if_busy: bool = False,
+    ):
+        if not worker and (max_concurrency != 1 or skip_if_busy):
+            raise ValueError("max_concurrency and skip_if_busy need worker=True")
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be at least 1: {max_concurrency}")
+        self.callback = callback
+        self.max_concurrency = max_concurrency
+        self.skip_if_busy = skip_if_busy
+        self.stats = CallbackStats()
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if worker:
+            self._executor = ThreadPoolExecutor(
+                max_concurrency, thread_name_prefix="scicamera-callback"
+            )
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, request: CompletedRequest) -> None:
+        """Run (or hand off) the callback, called from the runloop."""
+        if self._executor is None:
+            self._run(request)
+            return
+
+        with self._lock:
+            if self._in_flight >= self.max_concurrency:
+                self.stats.busy += 1
+                if self.skip_if_busy:
+                    self.stats.skipped += 1
+                    return
+            self._in_flight += 1
+
+        # Hold the request until the worker is done with it
+        request.acquire()
+        try:
+            self._executor.submit(self._run_and_release, request)
+        except RuntimeError:
+            # The callback was removed (and its executor shut down) meanwhile
+            self._done(request)
+
+    def _run(self, request: CompletedRequest) -> None:
+        frame_duration = request.metadata.get("FrameDuration")
+        start = time.perf_counter()
+        try:
+            self.callback(request)
+        except Exception as e:
+            _log.error(f"Error in request callback ({self.callback}): {e}")
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.stats.calls += 1
+            self.stats.total_time += elapsed
+            self.stats.max_time = max(self.stats.max_time, elapsed)
+            # With several runs at once, each may take that many frames and keep up
+            if frame_duration and elapsed * 1e6 > self.max_concurrency * frame_duration:
+                self.stats.overruns += 1
+
+    def _done(self, request: CompletedRequest) -> None:
+        request.release()
+        with self._lock:
+            self._in_flight -= 1
+
+    def _run_and_release(self, request: CompletedRequest) -> None:
+        try:
+            self._run(request)
+        finally:
+            self._done(request)
+
+    def close(self, wait: bool = False) -> None:
+        """Stop taking frames. Runs already queued or going still finish, which with
+        ``wait`` is waited for."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
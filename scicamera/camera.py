@@ -3,12 +3,13 @@
 from __future__ import annotations
 
 import logging
+import os
 import selectors
 import threading
 from collections import deque
 from dataclasses import replace
 from functools import partial
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import libcamera
 
@@ -23,7 +24,7 @@ from scicamera.lc_helpers import (
     lc_unpack,
     lc_unpack_controls,
 )
-from scicamera.request import CompletedRequest, LoopTask
+from scicamera.request import BufferMapCache, CompletedRequest, LoopTask
 from scicamera.sensor_format import SensorFormat
 from scicamera.tuning import TuningContext
 
@@ -55,6 +56,8 @@ class CameraManager:
         return self.cms.cameras[idx]
 
     def setup(self):
+        # Writing to this pipe wakes the listener, so it need not poll to stop
+        self._wakeup_read, self._wakeup_write = os.pipe()
         self.thread = threading.Thread(target=self.listen, daemon=True)
         self.running = True
         self.thread.start()
@@ -82,19 +85,23 @@ class CameraManager:
                 self.running = False
                 flag = True
         if flag:
+            os.write(self._wakeup_write, b"\0")
             self.thread.join()
+            os.close(self._wakeup_read)
+            os.close(self._wakeup_write)
 
     def listen(self):
         sel = selectors.DefaultSelector()
         sel.register(self.cms.event_fd, selectors.EVENT_READ, self.handle_request)
+        sel.register(self._wakeup_read, selectors.EVENT_READ, None)
 
         while self.running:
-            events = sel.select(0.05)
-            for key, _ in events:
+            for key, _ in sel.select():
                 callback = key.data
-                callback()
+                if callback is not None:
+                    callback()
 
-        sel.unregister(self.cms.event_fd)
+        sel.close()
 
     def handle_request(self, flushid: int | None = None) -> int:
         """Handle requests"""
@@ -119,6 +126,7 @@ class CameraManager:
                         replace(camera_inst.camera_config),
                         camera_inst.stream_map,
                         cleanup_call,
+                        camera_inst.buffer_maps,
                     )
                 )
         return n_flushed
@@ -127,20 +135,28 @@ class CameraManager:
 class Camera(RequestMachinery):
     """Welcome to the Camera class."""
 
-    def __init__(self, camera_num: int = 0, tuning=None):
+    def __init__(
+        self,
+        camera_num: int = 0,
+        tuning=None,
+        array_alignment: Optional[int] = None,
+    ):
         """Initialise camera system and open the camera for use.
 
         :param camera_num: Camera index, defaults to 0
         :type camera_num: int, optional
         :param tuning: Tuning filename, defaults to None
         :type tuning: str, optional
+        :param array_alignment: Byte alignment (e.g. 64) of pooled arrays, defaults to None
+        :type array_alignment: int, optional
         :raises RuntimeError: Init didn't complete
         """
-        super().__init__()
+        super().__init__(array_alignment)
         self._cm = CameraManager.singleton()
 
         self._cm.add(camera_num, self)
         self.camera_idx = camera_num
+        self.buffer_maps = BufferMapCache()
         self._reset_flags()
 
         with TuningContext(tuning):
@@ -287,8 +303,11 @@ class Camera(RequestMachinery):
 
         :raises RuntimeError: Closing failed
         """
+        self._close_streams()
         if self.is_runloop_running():
             self.stop_runloop()
+        self.offload_tasks(0)
+        self._finish_request_callbacks()
         if not self.is_open:
             return
 
@@ -305,6 +324,8 @@ class Camera(RequestMachinery):
         self.camera_config = None
         self._preview_configuration = None
         self.allocator = None
+        self.buffer_maps.close()
+        self.array_pool.configure(None)
         _log.info("Camera closed successfully.")
 
     def recycle_request(self, stop_count: int, request: libcamera.Request) -> None:
@@ -383,8 +404,9 @@ class Camera(RequestMachinery):
             raise RuntimeError("Camera must be stopped before configuring")
         camera_config = self._config_opts(config)
 
-        # Mark ourselves as unconfigured.
+        # Mark ourselves as unconfigured, the old buffers (if any) are about to go.
         self.camera_config = None
+        self.buffer_maps.close()
 
         # Check the config and turn it into a libcamera config.
         camera_config.apply(self.camera)
@@ -408,8 +430,11 @@ class Camera(RequestMachinery):
                 raise RuntimeError("Failed to allocate buffers.")
             msg = f"Allocated {len(self.allocator.buffers(stream))} buffers for stream {i}."
             _log.debug(msg)
+            # Map them now, so as not to map and unmap them on every frame.
+            self.buffer_maps.populate(self.allocator.buffers(stream))
         # Mark ourselves as configured.
         self.camera_config = camera_config
+        self.array_pool.configure(camera_config)
 
         # Set the controls directly so as to overwrite whatever is there.
         self.controls.set_controls(self.camera_config.controls)
@@ -427,6 +452,8 @@ class Camera(RequestMachinery):
         controls = self.controls.get_libcamera_controls()
         self.controls = Controls(self)
 
+        # Whichever way the camera (re)starts, the time stopped isn't frames dropped
+        self.frame_sequence.restart()
         return_code = self.camera.start(controls)
         lc_return_code_helper(return_code, "camera.start()")
 
@@ -471,6 +498,7 @@ class Camera(RequestMachinery):
 
     def stop(self) -> None:
         """Stop the camera."""
+        self._close_streams()
         if not self.started:
             _log.debug("Camera was not started")
             return
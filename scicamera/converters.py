@@ -1,5 +1,9 @@
+from typing import Optional, Tuple
+
 import numpy as np
 
+from scicamera.row_bands import run_in_row_bands
+
 YUV2RGB_JPEG = np.array([[1.0, 1.0, 1.0], [0.0, -0.344, 1.772], [1.402, -0.714, 0.0]])
 YUV2RGB_SMPTE170M = np.array(
     [[1.164, 1.164, 1.164], [0.0, -0.392, 2.017], [1.596, -0.813, 0.0]]
@@ -35,3 +39,191 @@ def YUV420_to_RGB(YUV_in, size, matrix=YUV2RGB_JPEG, rb_swap=True, final_width=0
         RGB = RGB[:, :final_width, :]
 
     return RGB
+
+
+# Fixed point conversion: coefficients are scaled by 2 ** _FRACTION_BITS, chroma is
+# int16 and the sums int32, which holds the largest (limited range) sums with room.
+_FRACTION_BITS = 16
+# Chroma rows converted at a time, keeping the int32 intermediates in cache.
+_CHROMA_ROWS_PER_BAND = 16
+
+
+def _fixed_point_coefficients(matrix: np.ndarray, rb_swap: bool) -> np.ndarray:
+    if rb_swap:
+        matrix = matrix[:, [2, 1, 0]]
+    return np.round(matrix * (1 << _FRACTION_BITS)).astype(np.int64)
+
+
+# Where the first Y, the U and the V sit in each 4 byte (2 pixel) group of the packed
+# 4:2:2 formats. The second Y is 2 bytes after the first.
+_PACKED_422_OFFSETS = {
+    "YUYV": (0, 1, 3),
+    "YVYU": (0, 3, 1),
+    "UYVY": (1, 0, 2),
+    "VYUY": (1, 2, 0),
+}
+
+
+def yuv_planes(
+    YUV_in: np.ndarray,
+    size: Tuple[int, int],
+    stride: Optional[int],
+    fmt: str,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Zero-copy views of the Y, U and V planes of a YUV buffer.
+
+    ``YUV_in`` is the buffer (or ``make_array`` result) of a stream of the given
+    (width, height) ``size`` and ``fmt``, with rows ``stride`` bytes long. Y is of
+    shape (height, width). U and V are (height / 2, width / 2) for the 4:2:0 formats
+    (YUV420, YVU420, NV12, NV21), and (height, width / 2) for the packed 4:2:2 ones
+    (YUYV, YVYU, UYVY, VYUY). For NV12/NV21 the U and V views interleave.
+    """
+    w, h = size
+    packed = fmt in _PACKED_422_OFFSETS
+    if w % 2 or (h % 2 and not packed):
+        raise ValueError(f"{fmt} images must have even dimensions, got {size}")
+    if fmt not in _PACKED_422_OFFSETS and fmt not in (
+        "YUV420",
+        "YVU420",
+        "NV12",
+        "NV21",
+    ):
+        raise ValueError(f"Not a YUV format: {fmt}")
+    if stride is None:
+        stride = 2 * w if packed else w
+    n = stride * h
+    chroma_rows = h // 2
+    if fmt in ("YUV420", "YVU420"):
+        n_chroma = 2 * (stride // 2) * chroma_rows
+    elif fmt in ("NV12", "NV21"):
+        n_chroma = stride * chroma_rows
+    else:
+        n_chroma = 0
+
+    flat = np.asarray(YUV_in, dtype=np.uint8).reshape(-1)
+    if flat.size < n + n_chroma:
+        raise ValueError(f"Buffer of {flat.size} bytes is too small for {fmt} {size}")
+
+    if packed:
+        y0, u, v = _PACKED_422_OFFSETS[fmt]
+        groups = flat[:n].reshape(h, stride)[:, : 2 * w].reshape(h, w // 2, 4)
+        return groups[..., y0::2].reshape(h, w), groups[..., u], groups[..., v]
+
+    Y = flat[:n].reshape(h, stride)[:, :w]
+    if fmt in ("NV12", "NV21"):
+        UV = flat[n : n + n_chroma].reshape(chroma_rows, stride)[:, :w]
+        U, V = UV[:, 0::2], UV[:, 1::2]
+        return (Y, V, U) if fmt == "NV21" else (Y, U, V)
+
+    stride2 = stride // 2
+    n4 = stride2 * chroma_rows
+    U = flat[n : n + n4].reshape(chroma_rows, stride2)[:, : w // 2]
+    V = flat[n + n4 : n + 2 * n4].reshape(chroma_rows, stride2)[:, : w // 2]
+    return (Y, V, U) if fmt == "YVU420" else (Y, U, V)
+
+
+def _planes_to_rgb(
+    Y: np.ndarray,
+    U: np.ndarray,
+    V: np.ndarray,
+    matrix: np.ndarray,
+    rb_swap: bool,
+    out: Optional[np.ndarray],
+    workers: int,
+) -> np.ndarray:
+    h, w = Y.shape
+    if out is None:
+        out = np.empty((h, w, 3), dtype=np.uint8)
+    elif out.dtype != np.uint8 or out.shape != (h, w, 3):
+        raise ValueError(
+            f"Output array must be uint8 of shape {(h, w, 3)}, "
+            f"got {out.dtype} of shape {out.shape}"
+        )
+    # Luma rows per chroma row: 2 for 4:2:0, 1 for 4:2:2
+    sub = h // U.shape[0]
+
+    coefficients = _fixed_point_coefficients(matrix, rb_swap)
+    y_coefficient = int(coefficients[0, 0])
+    # Matrices which scale Y are for limited range (16 to 235) luma
+    y_offset = 0 if matrix[0, 0] == 1.0 else 16
+    rounding = (1 << (_FRACTION_BITS - 1)) - y_offset * y_coefficient
+
+    def convert(rows: slice) -> None:
+        for start in range(rows.start, rows.stop, _CHROMA_ROWS_PER_BAND):
+            stop = min(start + _CHROMA_ROWS_PER_BAND, rows.stop)
+            u = U[start:stop].astype(np.int16)
+            u -= 128
+            v = V[start:stop].astype(np.int16)
+            v -= 128
+            y = np.multiply(Y[sub * start : sub * stop], y_coefficient, dtype=np.int32)
+            y += rounding
+            # Each chroma sample covers a (sub x 2) block of luma, so view the luma as
+            # (chroma rows, sub, chroma columns, 2) and broadcast the chroma over it.
+            y = y.reshape(stop - start, sub, w // 2, 2)
+            target = out[sub * start : sub * stop].reshape(
+                stop - start, sub, w // 2, 2, 3
+            )
+            channel = np.empty_like(y)
+            for c in range(3):
+                cu, cv = int(coefficients[1, c]), int(coefficients[2, c])
+                chroma = np.multiply(u, cu, dtype=np.int32) if cu else 0
+                if cv:
+                    chroma = chroma + np.multiply(v, cv, dtype=np.int32)
+                np.add(y, np.asarray(chroma)[:, None, :, None], out=channel)
+                channel >>= _FRACTION_BITS
+                np.clip(channel, 0, 255, out=channel)
+                np.copyto(target[..., c], channel, casting="unsafe")
+
+    run_in_row_bands(convert, U.shape[0], workers)
+    return out
+
+
+def YUV_to_RGB(
+    YUV_in: np.ndarray,
+    size: Tuple[int, int],
+    fmt: str,
+    stride: Optional[int] = None,
+    matrix: np.ndarray = YUV2RGB_JPEG,
+    rb_swap: bool = True,
+    out: Optional[np.ndarray] = None,
+    workers: int = 1,
+) -> np.ndarray:
+    """Convert an image in any of the YUV formats to interleaved RGB of full resolution.
+
+    ``YUV_in``, ``size``, ``fmt`` and ``stride`` are as for ``yuv_planes``. The
+    conversion is done in fixed point, with the chroma upsampled by replication, into
+    ``out`` if given: a uint8 array of shape (height, width, 3). ``workers`` threads
+    convert bands of rows in parallel. Unlike ``YUV420_to_RGB``, the limited range
+    matrices (SMPTE170M, Rec709) also offset luma by 16.
+    """
+    Y, U, V = yuv_planes(YUV_in, size, stride, fmt)
+    return _planes_to_rgb(Y, U, V, matrix, rb_swap, out, workers)
+
+
+def YUV420_to_RGB_full(
+    YUV_in: np.ndarray,
+    size: Tuple[int, int],
+    stride: Optional[int] = None,
+    matrix: np.ndarray = YUV2RGB_JPEG,
+    rb_swap: bool = True,
+    out: Optional[np.ndarray] = None,
+    workers: int = 1,
+) -> np.ndarray:
+    """Convert a YUV420 image to an interleaved RGB image of full resolution.
+
+    See ``YUV_to_RGB``, of which this is the YUV420 case.
+    """
+    return YUV_to_RGB(YUV_in, size, "YUV420", stride, matrix, rb_swap, out, workers)
+
+
+def YVU420_to_RGB_full(
+    YUV_in: np.ndarray,
+    size: Tuple[int, int],
+    stride: Optional[int] = None,
+    matrix: np.ndarray = YUV2RGB_JPEG,
+    rb_swap: bool = True,
+    out: Optional[np.ndarray] = None,
+    workers: int = 1,
+) -> np.ndarray:
+    """As ``YUV420_to_RGB_full``, for YVU420 images (with the V plane first)."""
+    return YUV_to_RGB(YUV_in, size, "YVU420", stride, matrix, rb_swap, out, workers)
@@ -0,0 +1,218 @@
+"""
+Demosaicing of raw Bayer frames to RGB, in pure (vectorised) NumPy.
+
+This gives colour images from the raw stream alone, without configuring the ISP main
+stream alongside it. There are three tiers, fastest first:
+
+- ``superpixel``: each 2x2 Bayer tile becomes one RGB pixel (half resolution).
+- ``bilinear``: missing colours are the average of their nearest neighbours.
+- ``gradient``: the gradient-corrected linear interpolation of Malvar, He and Cutler
+  (2004), which adds a Laplacian correction from the known colour to bilinear.
+
+The full resolution methods work on the four pixel sites of the Bayer tile at a time,
+as strided views of the mosaic, with a few quarter size accumulators.
+"""
+from __future__ import annotations
+
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from scicamera.formats import bayer_plane_indices, check_out
+from scicamera.sensor_format import SensorFormat
+
+DEMOSAIC_METHODS = ("superpixel", "bilinear", "gradient")
+
+_RGB = "RGB"
+
+# Interpolation kernels as (dy, dx, weight) taps, with weights summing to 16.
+_CROSS = [(-1, 0, 4), (1, 0, 4), (0, -1, 4), (0, 1, 4)]
+_DIAGONAL = [(-1, -1, 4), (-1, 1, 4), (1, -1, 4), (1, 1, 4)]
+_HORIZONTAL = [(0, -1, 8), (0, 1, 8)]
+_VERTICAL = [(-1, 0, 8), (1, 0, 8)]
+
+# Malvar-He-Cutler: the bilinear kernels above plus the centre and distance 2 taps.
+# fmt: off
+_G_AT_RB = [(0, 0, 8), (-1, 0, 4), (1, 0, 4), (0, -1, 4), (0, 1, 4),
+            (-2, 0, -2), (2, 0, -2), (0, -2, -2), (0, 2, -2)]
+_HORIZONTAL_MHC = [(0, 0, 10), (0, -1, 8), (0, 1, 8), (0, -2, -2), (0, 2, -2),
+                   (-1, -1, -2), (-1, 1, -2), (1, -1, -2), (1, 1, -2),
+                   (-2, 0, 1), (2, 0, 1)]
+_VERTICAL_MHC = [(dx, dy, w) for dy, dx, w in _HORIZONTAL_MHC]
+_DIAGONAL_MHC = [(0, 0, 12), (-1, -1, 4), (-1, 1, 4), (1, -1, 4), (1, 1, 4),
+                 (-2, 0, -3), (2, 0, -3), (0, -2, -3), (0, 2, -3)]
+# fmt: on
+
+_KERNELS = {
+    # method: (padding, green at R/B, across a row, across a column, diagonal)
+    "bilinear": (1, _CROSS, _HORIZONTAL, _VERTICAL, _DIAGONAL),
+    "gradient": (2, _G_AT_RB, _HORIZONTAL_MHC, _VERTICAL_MHC, _DIAGONAL_MHC),
+}
+
+
+def _check_mosaic(mosaic: np.ndarray, bayer_order: str) -> None:
+    bayer_plane_indices(bayer_order)  # raises for anything but a Bayer order
+    if mosaic.ndim != 2 or mosaic.shape[0] % 2 or mosaic.shape[1] % 2:
+        raise ValueError(f"Mosaic must be 2d with even dimensions, got {mosaic.shape}")
+    if mosaic.dtype not in (np.uint8, np.uint16):
+        raise ValueError(f"Mosaic must be uint8 or uint16, got {mosaic.dtype}")
+
+
+def _bayer_format(
+    bayer_order: str | SensorFormat, dtype: np.dtype, max_value: Optional[int]
+) -> Tuple[str, int]:
+    """The Bayer order and white level of a Bayer order (e.g. ``"RGGB"``) or raw format
+    (e.g. ``"SRGGB10_CSI2P"``). The white level defaults to the largest value of the
+    format's bit depth, or of ``dtype`` if only the Bayer order is given."""
+    bit_depth = None
+    if isinstance(bayer_order, SensorFormat) or not bayer_order.isalpha():
+        fmt = SensorFormat(str(bayer_order))
+        bayer_order, bit_depth = fmt.bayer_order, fmt.bit_depth
+    if max_value is None:
+        max_value = 2**bit_depth - 1 if bit_depth else np.iinfo(dtype).max
+    return bayer_order, max_value
+
+
+def demosaic_superpixel(
+    mosaic: np.ndarray,
+    bayer_order: str | SensorFormat,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Make a half resolution (h / 2, w / 2, 3) RGB image, one pixel per Bayer tile.
+
+    Red and blue are taken as they are, and green is the mean of the two greens.
+    """
+    bayer_order, _ = _bayer_format(bayer_order, mosaic.dtype, None)
+    _check_mosaic(mosaic, bayer_order)
+    h, w = mosaic.shape
+    out = check_out(out, (h // 2, w // 2, 3), mosaic.dtype)
+
+    sites = [mosaic[p // 2 :: 2, p % 2 :: 2] for p in range(4)]
+    greens = [site for site, colour in zip(sites, bayer_order) if colour == "G"]
+    np.copyto(out[..., 0], sites[bayer_order.index("R")])
+    np.copyto(out[..., 2], sites[bayer_order.index("B")])
+    # The mean of a and b without overflowing: (a & b) + ((a ^ b) >> 1)
+    np.bitwise_xor(greens[0], greens[1], out=out[..., 1])
+    out[..., 1] >>= 1
+    out[..., 1] += greens[0] & greens[1]
+    return out
+
+
+def _site_neighbours(
+    mosaic: np.ndarray, padding: int
+) -> Callable[[int, int, int, int], np.ndarray]:
+    """Return ``at(row, col, dy, dx)``: the (dy, dx) neighbours of one Bayer site.
+
+    The mosaic is mirrored at the edges, which keeps the Bayer pattern intact.
+    """
+    padded = np.pad(mosaic, padding, mode="reflect")
+    h, w = mosaic.shape
+
+    def at(row: int, col: int, dy: int, dx: int) -> np.ndarray:
+        y, x = padding + row + dy, padding + col + dx
+        return padded[y : y + h : 2, x : x + w : 2]
+
+    return at
+
+
+def _interpolate(
+    at: Callable[[int, int, int, int], np.ndarray],
+    row: int,
+    col: int,
+    taps: List[Tuple[int, int, int]],
+    target: np.ndarray,
+    max_value: int,
+    acc: np.ndarray,
+    scratch: np.ndarray,
+) -> None:
+    acc.fill(8)  # rounds the division by 16 below
+    for dy, dx, weight in taps:
+        np.multiply(at(row, col, dy, dx), weight, out=scratch, dtype=np.int32)
+        acc += scratch
+    acc >>= 4
+    np.clip(acc, 0, max_value, out=acc)
+    np.copyto(target, acc, casting="unsafe")
+
+
+def _demosaic_full(
+    mosaic: np.ndarray,
+    bayer_order: str | SensorFormat,
+    method: str,
+    out: Optional[np.ndarray],
+    max_value: Optional[int],
+) -> np.ndarray:
+    bayer_order, max_value = _bayer_format(bayer_order, mosaic.dtype, max_value)
+    _check_mosaic(mosaic, bayer_order)
+    h, w = mosaic.shape
+    out = check_out(out, (h, w, 3), mosaic.dtype)
+
+    padding, g_at_rb, horizontal, vertical, diagonal = _KERNELS[method]
+    at = _site_neighbours(mosaic, padding)
+    acc = np.empty((h // 2, w // 2), dtype=np.int32)
+    scratch = np.empty_like(acc)
+
+    for position, colour in enumerate(bayer_order):
+        row, col = position // 2, position % 2
+        channels = out[row::2, col::2]
+        np.copyto(channels[..., _RGB.index(colour)], at(row, col, 0, 0))
+
+        if colour == "G":
+            # The colours either side of a green are across its row and column
+            interpolations = [
+                (bayer_order[position ^ 1], horizontal),
+                (bayer_order[position ^ 2], vertical),
+            ]
+        else:
+            interpolations = [("G", g_at_rb), (bayer_order[position ^ 3], diagonal)]
+
+        for missing, taps in interpolations:
+            target = channels[..., _RGB.index(missing)]
+            _interpolate(at, row, col, taps, target, max_value, acc, scratch)
+    return out
+
+
+def demosaic_bilinear(
+    mosaic: np.ndarray,
+    bayer_order: str | SensorFormat,
+    out: Optional[np.ndarray] = None,
+    max_value: Optional[int] = None,
+) -> np.ndarray:
+    """Make a full resolution (h, w, 3) RGB image by bilinear interpolation."""
+    return _demosaic_full(mosaic, bayer_order, "bilinear", out, max_value)
+
+
+def demosaic_gradient(
+    mosaic: np.ndarray,
+    bayer_order: str | SensorFormat,
+    out: Optional[np.ndarray] = None,
+    max_value: Optional[int] = None,
+) -> np.ndarray:
+    """Make a full resolution (h, w, 3) RGB image by gradient-corrected interpolation.
+
+    The correction terms can overshoot, so results are clipped to ``max_value``, the
+    white level of the sensor. Given the raw format rather than just the Bayer order,
+    it defaults to that of the format's bit depth (e.g. 4095 for 12 bit).
+    """
+    return _demosaic_full(mosaic, bayer_order, "gradient", out, max_value)
+
+
+def demosaic(
+    mosaic: np.ndarray,
+    bayer_order: str | SensorFormat,
+    method: str = "bilinear",
+    out: Optional[np.ndarray] = None,
+    max_value: Optional[int] = None,
+) -> np.ndarray:
+    """Demosaic a 2d Bayer image (e.g. from ``make_array("raw")``) to RGB.
+
+    ``bayer_order`` is the raw stream's format (e.g. ``"SRGGB12_CSI2P"``) or just its
+    Bayer order, and ``method`` one of ``DEMOSAIC_METHODS``. The result has the dtype
+    of the mosaic, and is written to ``out`` if that is given. Interpolated values are
+    clipped to ``max_value``, by default the largest value of the format's bit depth
+    (or of the dtype, given just the Bayer order).
+    """
+    if method == "superpixel":
+        return demosaic_superpixel(mosaic, bayer_order, out=out)
+    if method in _KERNELS:
+        return _demosaic_full(mosaic, bayer_order, method, out, max_value)
+    raise ValueError(f"Unknown demosaic method {method}, use one of {DEMOSAIC_METHODS}")
@@ -6,9 +6,10 @@ the FakeCamera class will be a subclass of RequestMachinery so it can be
 used as a drop-in replacement for a real camera in basically every way.
 """
 import time
-from concurrent.futures import Future
+from collections import ChainMap
 from threading import Event, Thread
-from typing import Any, Dict, Tuple
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
 
 import libcamera
 import numpy as np
@@ -17,8 +18,7 @@ from scicamera.actions import RequestMachinery
 from scicamera.configuration import CameraConfig, StreamConfig
 from scicamera.controls import Controls
 from scicamera.info import CameraInfo
-from scicamera.request import CompletedRequest
-from scicamera.typing import TypedFuture
+from scicamera.request import AbstractCompletedRequest, CompletedRequest
 
 FAKE_SIZE = (320, 240)
 FAKE_FORMAT = "RGB888"
@@ -43,6 +43,7 @@ def make_fake_image(shape: Tuple[int, int]):
 
 class FakeCompletedRequest(CompletedRequest):
     def __init__(self, config: CameraConfig, metadata: Dict[str, Any]):
+        AbstractCompletedRequest.__init__(self)
         self.config = config
         self.completion_time = time.time()
         self._metadata = metadata
@@ -50,6 +51,10 @@ class FakeCompletedRequest(CompletedRequest):
             (self.completion_time - 1.0) * 1_000_000_000
         )
 
+    @property
+    def sequence(self) -> Optional[int]:
+        return None
+
     def acquire(self):
         pass
 
@@ -65,14 +70,24 @@ class FakeCompletedRequest(CompletedRequest):
         size = self.config.get_stream_config(name).size
         return make_fake_image(size).flatten()
 
+    def _map_buffer(self, name: str) -> Tuple[np.ndarray, Callable[[], None]]:
+        """There is nothing to map, so the "view" is just a fresh fake image."""
+        return self.get_buffer(name), lambda: None
+
+    @property
+    def metadata(self) -> Mapping[str, Any]:
+        return MappingProxyType(ChainMap(self._extra_metadata, self._metadata))
+
     def get_metadata(self) -> Dict[str, Any]:
         """Fetch the metadata corresponding to this completed request."""
-        return self._metadata
+        return dict(self.metadata)
 
 
 class FakeCamera(RequestMachinery):
-    def __init__(self, camera_num: int = 0, tuning=None) -> None:
-        super().__init__()
+    def __init__(
+        self, camera_num: int = 0, tuning=None, array_alignment: Optional[int] = None
+    ) -> None:
+        super().__init__(array_alignment)
         self._t = Thread(target=lambda: None, daemon=True)
         self._t.start()
         self._t.join()
@@ -104,16 +119,36 @@ class FakeCamera(RequestMachinery):
             color_space=libcamera.ColorSpace.Sycc(),
             main=StreamConfig(size=FAKE_SIZE, format=FAKE_FORMAT, stride=FAKE_STRIDE),
         )
+        # Fake requests always carry this config, whatever the camera is configured to
+        self.array_pool.configure(self.config)
+
+    def _has_work_before_frame(self) -> bool:
+        return self._abort.is_set() or self._has_runnable_task()
 
     def _run(self):
-        while not self._abort.wait(self.controls.FrameDurationLimits[0] / 1000000):
+        next_frame = time.monotonic()
+        while True:
+            period = self.controls.FrameDurationLimits[0] / 1000000
+            # Don't burst out frames to catch up after falling behind
+            next_frame = max(next_frame, time.monotonic()) + period
+            # Wait for the next frame, but run tasks needing no request as they come
+            while not self._abort.is_set():
+                timeout = next_frame - time.monotonic()
+                if timeout <= 0:
+                    break
+                with self._runloop_cond:
+                    self._runloop_cond.wait_for(self._has_work_before_frame, timeout)
+                self.process_requests()
+            if self._abort.is_set():
+                break
+
             metadata = self.controls.make_dict()
 
             metadata.update(
                 {
                     "AeLocked": False,
                     "FocusFoM": 93,
-                    "FrameDuration": 24994,
+                    "FrameDuration": round(period * 1000000),
                     "Lux": 330.6990051269531,
                 }
             )
@@ -148,21 +183,28 @@ class FakeCamera(RequestMachinery):
     def start(self) -> None:
         self._t = Thread(target=self._run, daemon=True)
         self._abort.clear()
+        self.frame_sequence.restart()
         self._t.start()
 
     def stop(self) -> None:
+        self._close_streams()
         self._abort.set()
+        with self._runloop_cond:
+            self._runloop_cond.notify_all()
         self._t.join()
 
     def close(self) -> None:
+        self._close_streams()
         if self._t.is_alive():
             self.stop()
+        self.offload_tasks(0)
+        self._finish_request_callbacks()
 
-    def switch_mode(self, camera_config: CameraConfig) -> TypedFuture[CameraConfig]:
+    def _switch_mode(self, camera_config: CameraConfig) -> CameraConfig:
+        # A real camera is stopped and started again, losing the frames meanwhile
         self.configure(camera_config)
-        future = Future()
-        future.set_result(camera_config)
-        return future
+        self.frame_sequence.restart()
+        return self.camera_config
 
     # TODO(meawoppl) - Kill methods below here
     def set_controls(self, controls: Dict[str, Any]) -> None:
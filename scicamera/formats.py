@@ -1,8 +1,9 @@
 import math
-from typing import Tuple
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
 
 import numpy as np
 
+from scicamera.row_bands import run_in_row_bands
 from scicamera.sensor_format import SensorFormat
 
 YUV_FORMATS = {"NV21", "NV12", "YUV420", "YVU420", "YVYU", "YUYV", "UYVY", "VYUY"}
@@ -71,116 +72,531 @@ def _assert_is_byte_array(array: np.ndarray) -> None:
     assert array.ndim == 1, "Unpack raw only accepts flat arrays"
 
 
-# NOTE(meawoppl) - the below implementations are a bit memory inefficient when it comes
-# to deserialization of the 10/12 bit arrays, as it will overallocated by 1/5 and 1/3
-# respectively. This is a tradeoff for simplicity of implementation using numpy.
-# The approach breaks down to the following:
-# - Compute the number of bytes needed at which the data realigns itself to the next byte boundary
-#   - for 10 bit (4 pixels) - 40 bits, 5 bytes
-#   - fot 12 bit (2 pixels) - 24 bits, 3 bytes
-# - Unspool things into alignment blocks (0th axis) and realigned stuff within the blocks
-# - Flatten the index space downward, and trim the tail of the array away (assumed extra bits)
+# CSI2P packing stores pixels in small groups which realign to a byte boundary:
+#   - 10 bit: 4 pixels in 5 bytes (40 bits)
+#   - 12 bit: 2 pixels in 3 bytes (24 bits)
+# Each row of the buffer is a run of these groups, padded out to the stream stride.
+# The decoders below view the rows of the mapped buffer as (rows, groups, bytes) and
+# write the k'th pixel of every group straight into ``targets[k]``, a (strided) view
+# of whatever output is wanted, so no padded copy or overallocated scratch array is
+# ever made. For a plain image ``targets[k]`` is ``out[:, k::n_pixels]``.
+CSI2P_GROUPS = {10: (4, 5), 12: (2, 3)}
+"""Map of bit depth to (pixels, bytes) of one CSI2P packing group."""
 
 
-def _unpack_10bit(array: np.ndarray) -> np.ndarray:
-    original_len = array.size
-    array16 = array.reshape((-1, 5)).astype(np.uint16)
-
-    unpacked_data = np.zeros((array16.shape[0], 4), dtype=np.uint16)
+def _unpack_10bit(groups: np.ndarray, targets: Sequence[np.ndarray]) -> None:
+    b0, b1, b2, b3, b4 = (groups[..., i] for i in range(5))
+    t0, t1, t2, t3 = targets
     # fmt: off
-    unpacked_data[:, 0] = ((array16[:, 0] << 2) | (array16[:, 1] >> 6)) & 0x3FF
-    unpacked_data[:, 1] = ((array16[:, 1] << 4) | (array16[:, 2] >> 4)) & 0x3FF
-    unpacked_data[:, 2] = ((array16[:, 2] << 6) | (array16[:, 3] >> 2)) & 0x3FF
-    unpacked_data[:, 3] = ((array16[:, 3] << 8) | (array16[:, 4]     )) & 0x3FF
+    np.left_shift(b0,        2, out=t0, dtype=np.uint16)
+    np.left_shift(b1 & 0x3F, 4, out=t1, dtype=np.uint16)
+    np.left_shift(b2 & 0x0F, 6, out=t2, dtype=np.uint16)
+    np.left_shift(b3 & 0x03, 8, out=t3, dtype=np.uint16)
+    t0 |= b1 >> 6
+    t1 |= b2 >> 4
+    t2 |= b3 >> 2
+    t3 |= b4
     # fmt: on
 
-    return unpacked_data.ravel()[: original_len * 4 // 5]
-
-
-def _unpack_12bit(array: np.ndarray) -> np.ndarray:
-    original_len = array.size
-    array16 = array.reshape((-1, 3)).astype(np.uint16)
 
-    unpacked_data = np.zeros((array16.shape[0], 2), dtype=np.uint16)
+def _unpack_12bit(groups: np.ndarray, targets: Sequence[np.ndarray]) -> None:
+    b0, b1, b2 = (groups[..., i] for i in range(3))
+    t0, t1 = targets
     # fmt: off
-    unpacked_data[:, 0] = ((array16[:, 0] << 4) | ((array16[:, 2] >> 0) & 0xF)) & 0xFFF
-    unpacked_data[:, 1] = ((array16[:, 1] << 4) | ((array16[:, 2] >> 4) & 0xF)) & 0xFFF
+    np.left_shift(b0, 4, out=t0, dtype=np.uint16)
+    np.left_shift(b1, 4, out=t1, dtype=np.uint16)
+    t0 |= b2 & 0x0F
+    t1 |= b2 >> 4
     # fmt: on
 
-    return unpacked_data.ravel()[: original_len * 2 // 3]
+
+_UNPACKERS = {10: _unpack_10bit, 12: _unpack_12bit}
 
 
 def round_up_to_multiple(value: int, multiple: int) -> int:
     return math.ceil(value / multiple) * multiple
 
 
+def csi2p_row_bytes(width: int, bit_depth: int) -> int:
+    """The number of bytes holding ``width`` CSI2P packed pixels (excluding padding)."""
+    return round_up_to_multiple(bit_depth * width, 8) // 8
+
+
+def csi2p_stride(width: int, bit_depth: int, alignment: int = 32) -> int:
+    """The stride of a CSI2P row, assuming the Unicam padding to ``alignment`` bytes.
+
+    This is only a fallback for when the real stride of the stream is not known.
+    """
+    return round_up_to_multiple(csi2p_row_bytes(width, bit_depth), alignment)
+
+
+def check_out(
+    out: Optional[np.ndarray], shape: Tuple[int, ...], dtype=np.uint16
+) -> np.ndarray:
+    """Return ``out`` if it is an array of ``shape`` and ``dtype`` to write into,
+    or a new one if it is ``None``."""
+    if out is None:
+        return np.empty(shape, dtype=dtype)
+    if out.dtype != dtype or out.shape != tuple(shape):
+        raise ValueError(
+            f"Output array must be {np.dtype(dtype)} of shape {tuple(shape)}, "
+            f"got {out.dtype} of shape {out.shape}"
+        )
+    return out
+
+
+def _unpack_csi2p_rows(
+    rows: np.ndarray, bit_depth: int, width: int, targets: Sequence[np.ndarray]
+) -> None:
+    """Decode a (rows, stride) byte view of ``width`` pixels into ``targets``.
+
+    ``targets[k]`` receives pixel columns ``k, k + n_pixels, ...`` of the rows.
+    """
+    n_pixels, n_bytes = CSI2P_GROUPS[bit_depth]
+    unpack = _UNPACKERS[bit_depth]
+    height = rows.shape[0]
+
+    n_groups = width // n_pixels
+    if n_groups:
+        groups = rows[:, : n_groups * n_bytes].reshape((height, n_groups, n_bytes))
+        unpack(groups, [target[:, :n_groups] for target in targets])
+
+    # A trailing partial group (odd widths) may be cut short by the stride, so it
+    # is decoded through a small zero-padded copy of just that column of groups.
+    n_tail = width - n_groups * n_pixels
+    if n_tail:
+        start = n_groups * n_bytes
+        available = min(n_bytes, rows.shape[1] - start)
+        tail = np.zeros((height, 1, n_bytes), dtype=np.uint8)
+        tail[:, 0, :available] = rows[:, start : start + available]
+        decoded = np.empty((n_pixels, height, 1), dtype=np.uint16)
+        unpack(tail, decoded)
+        for k in range(n_tail):
+            targets[k][:, n_groups] = decoded[k, :, 0]
+
+
+def _strided_rows(raw: np.ndarray, height: int, stride: int, row_bytes: int):
+    if stride < row_bytes:
+        raise ValueError(f"Stride {stride} is smaller than the row length {row_bytes}")
+    if raw.size < stride * height:
+        raise ValueError(
+            f"Raw data size {raw.size} is smaller than expected size {stride * height}"
+        )
+    return raw[: stride * height].reshape((height, stride))
+
+
 def unpack_csi_padded(
-    raw: np.ndarray, pixel_shape: Tuple[int, int], fmt: SensorFormat
+    raw: np.ndarray,
+    pixel_shape: Tuple[int, int],
+    fmt: SensorFormat,
+    stride: Optional[int] = None,
+    out: Optional[np.ndarray] = None,
+    workers: int = 1,
 ) -> np.ndarray:
     """
     Args:
         raw: Flat uint8 array of bytes from the camera
         pixel_shape: the shape of the image in pixels (height, width)
-        fmt:
+        fmt: the sensor format of the data, which must use CSI2P packing
+        stride: the length of each row in bytes, including padding. Defaults to
+            the Unicam behaviour of padding rows to a multiple of 32 bytes.
+        out: optional uint16 array of ``pixel_shape`` to decode into
+        workers: the number of threads to decode bands of rows with
 
     """
     _assert_is_byte_array(raw)
     assert fmt.packing == "CSI2P", "This method only treats CSI2P packing"
+    if fmt.bit_depth not in CSI2P_GROUPS:
+        raise RuntimeError(f"Unsupported bit depth for CSI2P unpacking: {fmt}")
 
-    # The Unicam (MIPI CSI?) series of sensors pad each row up to the nearest multiple of 32 bytes.
-    # This is somewhat annoying to deal with, as we need also to also keep alignment
-    # with the 10/12 bit packing.
+    height, width = pixel_shape
+    if stride is None:
+        stride = csi2p_stride(width, fmt.bit_depth)
 
-    # 1. Compute the smallest nominal np array shape which meets the bit-alignment requirements
-    row_bit_length = fmt.bit_depth * pixel_shape[1]
-    row_byte_length = round_up_to_multiple(row_bit_length, 8) // 8
-    row_byte_length_padded = round_up_to_multiple(row_byte_length, 32)
+    row_bytes = csi2p_row_bytes(width, fmt.bit_depth)
+    rows = _strided_rows(raw, height, stride, row_bytes)
+    out = check_out(out, pixel_shape)
+    n_pixels = CSI2P_GROUPS[fmt.bit_depth][0]
 
-    expected_data_length = row_byte_length_padded * pixel_shape[0]
-    if raw.size != expected_data_length:
-        raise ValueError(
-            f"Raw data size {raw.size} does not match expected size {expected_data_length}"
-        )
+    # Every row starts on a packing group boundary, so bands of rows decode independently.
+    def decode_band(band: slice) -> None:
+        targets = [out[band, k::n_pixels] for k in range(n_pixels)]
+        _unpack_csi2p_rows(rows[band], fmt.bit_depth, width, targets)
+
+    run_in_row_bands(decode_band, height, workers)
+    return out
 
-    n_rows = raw.size // row_byte_length_padded
-    raw_rows = raw.reshape((-1, row_byte_length_padded))
 
-    if fmt.bit_depth == 10:
-        aligned_row_length = round_up_to_multiple(row_byte_length_padded, 5)
-    if fmt.bit_depth == 12:
-        aligned_row_length = round_up_to_multiple(row_byte_length_padded, 3)
+def _is_byte_aligned(fmt: SensorFormat) -> bool:
+    """Whether every pixel of the format sits in its own 8 or 16 bit container."""
+    return fmt.packing is None or fmt.bit_depth == 8
 
-    # 2. Copy the raw data into that array
-    aligned_for_unpacking = np.zeros(
-        (raw_rows.shape[0], aligned_row_length), dtype=np.uint8
-    )
-    aligned_for_unpacking[:, :row_byte_length_padded] = raw_rows
 
-    # 3. Flatten and convert the byte-array into a uint16 array
-    if fmt.bit_depth == 10:
-        unpacked = _unpack_10bit(aligned_for_unpacking.ravel())
-    if fmt.bit_depth == 12:
-        unpacked = _unpack_12bit(aligned_for_unpacking.ravel())
+def raw_view(
+    raw: np.ndarray,
+    pixel_shape: Tuple[int, int],
+    fmt: SensorFormat,
+    stride: Optional[int] = None,
+) -> np.ndarray:
+    """A zero-copy 2d view of a raw buffer in one of the unpacked formats.
+
+    The 8 bit formats are viewed as uint8, and the 10/12 bit ones (which are stored
+    in little endian 16 bit containers) as uint16. Row padding is sliced away, so the
+    result is not contiguous unless ``stride`` is exactly the row length.
+    """
+    _assert_is_byte_array(raw)
+    if not _is_byte_aligned(fmt):
+        raise ValueError(f"Format {fmt} is packed, and cannot be viewed directly")
 
-    # 4. reshape the uint16 array into the desired shape
-    unpacked_padded = unpacked.reshape((n_rows, -1))
+    height, width = pixel_shape
+    itemsize = 1 if fmt.bit_depth == 8 else 2
+    if stride is None:
+        stride = width * itemsize
+    if stride % itemsize:
+        raise ValueError(f"Stride {stride} is not a whole number of pixels for {fmt}")
 
-    # 5. trim the tails of the horizontal lines away to the correct shape
-    trimmed = unpacked_padded[:, : pixel_shape[1]]
-    return trimmed
+    rows = _strided_rows(raw, height, stride, width * itemsize)
+    if itemsize == 2:
+        rows = rows.view("<u2")
+    return rows[:, :width]
 
 
 def unpack_raw(
-    raw: np.ndarray, pixel_shape: Tuple[int, int], fmt: SensorFormat
+    raw: np.ndarray,
+    pixel_shape: Tuple[int, int],
+    fmt: SensorFormat,
+    stride: Optional[int] = None,
+    out: Optional[np.ndarray] = None,
+    workers: int = 1,
+    binning: int = 1,
+    roi: Optional[Tuple[int, int, int, int]] = None,
 ) -> np.ndarray:
     """
     This converts a raw numpy byte array (flat, uint8) into a 2d numpy array of `pixel_shape`
     and dtype baed on SensorFormat. Note that in most formats this will still be a bayered image.
+
+    ``stride`` is the row length of the buffer in bytes (``StreamConfig.stride``), and
+    ``out`` an optional preallocated array to decode into, which is then returned.
+    ``workers`` > 1 splits the decode into bands of rows run on a shared thread pool.
+
+    Formats with no bit packing (and the 8 bit ones) need no decoding, so unless ``out``
+    is given these are returned as a zero-copy view of ``raw`` (see :func:`raw_view`).
+
+    ``binning`` > 1 sums blocks of pixels as they are decoded, see :func:`unpack_raw_binned`,
+    and ``roi`` decodes only a (x, y, width, height) window, see :func:`unpack_raw_roi`.
     """
     _assert_is_byte_array(raw)
 
+    if roi is not None:
+        if binning > 1:
+            raise ValueError("Binning a region of interest is not supported")
+        return unpack_raw_roi(
+            raw, pixel_shape, fmt, roi, stride=stride, out=out, workers=workers
+        )
+    if binning > 1:
+        return unpack_raw_binned(
+            raw, pixel_shape, fmt, binning, stride=stride, out=out, workers=workers
+        )
+
+    if _is_byte_aligned(fmt):
+        view = raw_view(raw, pixel_shape, fmt, stride=stride)
+        if out is None:
+            return view
+        np.copyto(check_out(out, pixel_shape, view.dtype), view)
+        return out
+
     # TODO(meawoppl) - add other packed formats here
     if fmt.packing == "CSI2P":
-        return unpack_csi_padded(raw, pixel_shape, fmt)
+        return unpack_csi_padded(
+            raw, pixel_shape, fmt, stride=stride, out=out, workers=workers
+        )
     else:
         raise RuntimeError(f"Unsupported bit raw format: {fmt}")
+
+
+BAYER_PLANES = ("R", "Gr", "Gb", "B")
+"""The order of the colour planes returned by :func:`unpack_raw_planes`."""
+
+
+def bayer_plane_indices(bayer_order: str) -> List[int]:
+    """For each position of the 2x2 Bayer tile (row major), the index of its plane.
+
+    The green on the red row is "Gr", the green on the blue row "Gb".
+    """
+    greens = [position for position, colour in enumerate(bayer_order) if colour == "G"]
+    if sorted(bayer_order) != ["B", "G", "G", "R"] or greens not in ([0, 3], [1, 2]):
+        raise ValueError(f"Not a Bayer order: {bayer_order}")
+    indices = []
+    for position, colour in enumerate(bayer_order):
+        if colour == "G":
+            row_neighbour = bayer_order[position ^ 1]
+            colour = "Gr" if row_neighbour == "R" else "Gb"
+        indices.append(BAYER_PLANES.index(colour))
+    return indices
+
+
+def unpack_raw_planes(
+    raw: np.ndarray,
+    pixel_shape: Tuple[int, int],
+    fmt: SensorFormat,
+    stride: Optional[int] = None,
+    out: Optional[np.ndarray] = None,
+    workers: int = 1,
+) -> np.ndarray:
+    """Unpack a Bayer raw buffer straight into its four half resolution colour planes.
+
+    The result is an array of shape (4, height / 2, width / 2) holding the planes
+    in :data:`BAYER_PLANES` order (R, Gr, Gb, B), worked out from ``fmt.bayer_order``.
+    It is uint16, except for the 8 bit formats which stay uint8.
+    If the image has been flipped, pass a format that has had
+    :meth:`SensorFormat.transform` applied to it.
+
+    The packed bytes are only read once, and the full resolution mosaic is never made.
+    As with :func:`unpack_raw`, ``workers`` > 1 decodes bands of rows in parallel.
+    """
+    _assert_is_byte_array(raw)
+    if fmt.mono:
+        raise ValueError(f"Cannot split mono format {fmt} into Bayer planes")
+    height, width = pixel_shape
+    if height % 2 or width % 2:
+        raise ValueError(f"Bayer images must have even dimensions, got {pixel_shape}")
+
+    plane_indices = bayer_plane_indices(fmt.bayer_order)
+    if _is_byte_aligned(fmt):
+        mosaic = raw_view(raw, pixel_shape, fmt, stride=stride)
+        out = check_out(out, (4, height // 2, width // 2), mosaic.dtype)
+        for position, index in enumerate(plane_indices):
+            np.copyto(out[index], mosaic[position // 2 :: 2, position % 2 :: 2])
+        return out
+
+    if fmt.packing != "CSI2P" or fmt.bit_depth not in CSI2P_GROUPS:
+        raise RuntimeError(f"Unsupported bit raw format: {fmt}")
+
+    if stride is None:
+        stride = csi2p_stride(width, fmt.bit_depth)
+    rows = _strided_rows(raw, height, stride, csi2p_row_bytes(width, fmt.bit_depth))
+    out = check_out(out, (4, height // 2, width // 2))
+
+    # Pixel k of a packing group sits in column parity k % 2, and within that plane
+    # steps through the columns k // 2, k // 2 + n_pixels // 2, ...
+    n_pixels = CSI2P_GROUPS[fmt.bit_depth][0]
+
+    def decode_band(band: slice) -> None:
+        for row_parity in range(2):
+            planes = [out[plane_indices[2 * row_parity + c], band] for c in range(2)]
+            targets = [
+                planes[k % 2][:, k // 2 :: n_pixels // 2] for k in range(n_pixels)
+            ]
+            band_rows = rows[2 * band.start + row_parity : 2 * band.stop : 2]
+            _unpack_csi2p_rows(band_rows, fmt.bit_depth, width, targets)
+
+    run_in_row_bands(decode_band, height // 2, workers)
+    return out
+
+
+_ROWS_PER_BAND = 64
+
+
+def iter_raw_rows(
+    raw: np.ndarray,
+    pixel_shape: Tuple[int, int],
+    fmt: SensorFormat,
+    stride: Optional[int] = None,
+    start: int = 0,
+    step: int = 1,
+) -> Iterator[np.ndarray]:
+    """Yield the rows ``start::step`` of a raw image as pixel values, a band of rows
+    at a time, without making the whole frame.
+
+    Unpacked formats give views of ``raw`` (see ``raw_view``), and CSI2P ones are
+    decoded into one small uint16 scratch band which is reused, so each band is only
+    valid until the next one is asked for.
+    """
+    _assert_is_byte_array(raw)
+    height, width = pixel_shape
+    if _is_byte_aligned(fmt):
+        rows = raw_view(raw, pixel_shape, fmt, stride=stride)
+        decode = None
+    elif fmt.packing == "CSI2P" and fmt.bit_depth in CSI2P_GROUPS:
+        if stride is None:
+            stride = csi2p_stride(width, fmt.bit_depth)
+        rows = _strided_rows(raw, height, stride, csi2p_row_bytes(width, fmt.bit_depth))
+        n_pixels = CSI2P_GROUPS[fmt.bit_depth][0]
+        scratch = np.empty((_ROWS_PER_BAND, width), dtype=np.uint16)
+        decode = fmt.bit_depth
+    else:
+        raise RuntimeError(f"Unsupported bit raw format: {fmt}")
+
+    sampled = rows[start::step]
+    for first in range(0, sampled.shape[0], _ROWS_PER_BAND):
+        band = sampled[first : first + _ROWS_PER_BAND]
+        if decode is not None:
+            lines = scratch[: band.shape[0]]
+            targets = [lines[:, k::n_pixels] for k in range(n_pixels)]
+            _unpack_csi2p_rows(band, decode, width, targets)
+            band = lines
+        yield band
+
+
+def binned_shape(
+    pixel_shape: Tuple[int, int], fmt: SensorFormat, factor: int
+) -> Tuple[int, int]:
+    """The (height, width) of a raw image after binning by ``factor``.
+
+    Rows and columns left over that do not fill a whole bin are dropped.
+    """
+    tile = 1 if fmt.mono else 2
+    block = tile * factor
+    return (pixel_shape[0] // block * tile, pixel_shape[1] // block * tile)
+
+
+def unpack_raw_binned(
+    raw: np.ndarray,
+    pixel_shape: Tuple[int, int],
+    fmt: SensorFormat,
+    factor: int,
+    stride: Optional[int] = None,
+    out: Optional[np.ndarray] = None,
+    workers: int = 1,
+) -> np.ndarray:
+    """Unpack a raw buffer, summing ``factor`` x ``factor`` bins of pixels as it goes.
+
+    Mono formats sum neighbouring pixels. Bayer formats sum the neighbouring pixels of
+    the same colour, so the result is again a Bayer mosaic in the same order, of shape
+    :func:`binned_shape`.
+
+    The rows are decoded a band at a time into a small scratch array and summed straight
+    into the output, so the memory needed is that of the binned image. The sums are
+    uint16 where they cannot overflow (e.g. 4x4 bins of 12 bit data) and uint32 otherwise,
+    though a (C contiguous) uint32 ``out`` may always be given.
+    """
+    _assert_is_byte_array(raw)
+    if factor < 1:
+        raise ValueError(f"Binning factor must be at least 1, got {factor}")
+
+    height, width = pixel_shape
+    tile = 1 if fmt.mono else 2
+    block = tile * factor
+    shape = binned_shape(pixel_shape, fmt, factor)
+    if 0 in shape:
+        raise ValueError(f"Image of shape {pixel_shape} too small to bin by {factor}")
+
+    max_sum = factor * factor * ((1 << fmt.bit_depth) - 1)
+    dtype = np.uint16 if max_sum <= 0xFFFF else np.uint32
+    if out is not None and out.dtype == np.uint32:
+        dtype = np.uint32
+    out = check_out(out, shape, dtype)
+    if not out.flags.c_contiguous:
+        raise ValueError("Output array for binning must be C contiguous")
+
+    byte_aligned = _is_byte_aligned(fmt)
+    if byte_aligned:
+        rows = raw_view(raw, pixel_shape, fmt, stride=stride)
+    elif fmt.packing == "CSI2P" and fmt.bit_depth in CSI2P_GROUPS:
+        if stride is None:
+            stride = csi2p_stride(width, fmt.bit_depth)
+        rows = _strided_rows(raw, height, stride, csi2p_row_bytes(width, fmt.bit_depth))
+        n_pixels = CSI2P_GROUPS[fmt.bit_depth][0]
+    else:
+        raise RuntimeError(f"Unsupported bit raw format: {fmt}")
+
+    n_bins_y, n_bins_x = shape[0] // tile, shape[1] // tile
+    bins_per_band = max(1, _ROWS_PER_BAND // block)
+
+    def bin_band(band: slice) -> None:
+        if not byte_aligned:
+            scratch = np.empty((bins_per_band * block, width), dtype=np.uint16)
+        row_sums = np.empty(
+            (bins_per_band, tile, n_bins_x, factor, tile), dtype=out.dtype
+        )
+        for start in range(band.start, band.stop, bins_per_band):
+            stop = min(start + bins_per_band, band.stop)
+            lines = rows[start * block : stop * block]
+            if not byte_aligned:
+                decoded = scratch[: lines.shape[0]]
+                targets = [decoded[:, k::n_pixels] for k in range(n_pixels)]
+                _unpack_csi2p_rows(lines, fmt.bit_depth, width, targets)
+                lines = decoded
+            # Pixel rows are ((bin row * factor) + i) * tile + parity, columns likewise
+            bins = lines[:, : n_bins_x * block].reshape(
+                (stop - start, factor, tile, n_bins_x, factor, tile)
+            )
+            binned = out[start * tile : stop * tile].reshape(
+                (stop - start, tile, n_bins_x, tile)
+            )
+            # Summing the rows then the columns of the bins with a few whole array
+            # adds is much quicker than a np.sum over both (strided) axes at once.
+            band_sums = row_sums[: stop - start]
+            np.copyto(band_sums, bins[:, 0])
+            for i in range(1, factor):
+                band_sums += bins[:, i]
+            np.copyto(binned, band_sums[:, :, :, 0])
+            for i in range(1, factor):
+                binned += band_sums[:, :, :, i]
+
+    run_in_row_bands(bin_band, n_bins_y, workers)
+    return out
+
+
+def unpack_raw_roi(
+    raw: np.ndarray,
+    pixel_shape: Tuple[int, int],
+    fmt: SensorFormat,
+    roi: Tuple[int, int, int, int],
+    stride: Optional[int] = None,
+    out: Optional[np.ndarray] = None,
+    workers: int = 1,
+) -> np.ndarray:
+    """Unpack only the (x, y, width, height) region of interest of a raw buffer.
+
+    Only the rows of the region, and the packing groups covering its columns, are
+    decoded, so the cost is proportional to the area of the region. The result has
+    shape (height, width). Note that a Bayer region at odd x or y starts on a different
+    colour, so its Bayer order differs from that of the format.
+    """
+    _assert_is_byte_array(raw)
+    x, y, w, h = roi
+    if w <= 0 or h <= 0 or x < 0 or y < 0:
+        raise ValueError(f"Invalid region of interest {roi}")
+    if x + w > pixel_shape[1] or y + h > pixel_shape[0]:
+        raise ValueError(f"Region of interest {roi} exceeds image shape {pixel_shape}")
+
+    if _is_byte_aligned(fmt):
+        view = raw_view(raw, pixel_shape, fmt, stride=stride)[y : y + h, x : x + w]
+        if out is None:
+            return view
+        np.copyto(check_out(out, (h, w), view.dtype), view)
+        return out
+
+    if fmt.packing != "CSI2P" or fmt.bit_depth not in CSI2P_GROUPS:
+        raise RuntimeError(f"Unsupported bit raw format: {fmt}")
+    height, width = pixel_shape
+    if stride is None:
+        stride = csi2p_stride(width, fmt.bit_depth)
+    rows = _strided_rows(raw, height, stride, csi2p_row_bytes(width, fmt.bit_depth))
+    out = check_out(out, (h, w))
+
+    # Cut the rows down to the whole packing groups covering the region's columns
+    n_pixels, n_bytes = CSI2P_GROUPS[fmt.bit_depth]
+    first_group = x // n_pixels
+    last_group = -(-(x + w) // n_pixels)
+    groups = rows[y : y + h, first_group * n_bytes : last_group * n_bytes]
+    offset = x - first_group * n_pixels
+
+    def decode_band(band: slice) -> None:
+        if offset == 0:
+            targets = [out[band, k::n_pixels] for k in range(n_pixels)]
+            _unpack_csi2p_rows(groups[band], fmt.bit_depth, w, targets)
+            return
+
+        # The region starts part way into a group, so decode via a small scratch
+        scratch = np.empty((_ROWS_PER_BAND, offset + w), dtype=np.uint16)
+        for start in range(band.start, band.stop, _ROWS_PER_BAND):
+            stop = min(start + _ROWS_PER_BAND, band.stop)
+            decoded = scratch[: stop - start]
+            targets = [decoded[:, k::n_pixels] for k in range(n_pixels)]
+            _unpack_csi2p_rows(groups[start:stop], fmt.bit_depth, offset + w, targets)
+            out[start:stop] = decoded[:, offset:]
+
+    run_in_row_bands(decode_band, h, workers)
+    return out
@@ -1,11 +1,24 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import Dict, Sequence
 
 import numpy as np
 
+from scicamera.array_pool import array_spec
 from scicamera.request import CompletedRequest
 
+BURST_METADATA = (
+    "SensorTimestamp",
+    "ExposureTime",
+    "AnalogueGain",
+    "DigitalGain",
+    "FrameDuration",
+    "ColourTemperature",
+    "Lux",
+    "dropped_before",
+)
+
 
 @dataclass
 class CameraFrame:
@@ -26,3 +39,77 @@ class CameraFrame:
             controls=request.config.controls.make_dict(),
             metadata=request.get_metadata(),
         )
+
+
+@dataclass
+class CameraBurst:
+    arrays: np.ndarray
+    """The images of the burst stacked in one array, of shape (n, ...)."""
+
+    metadata: Dict[str, np.ndarray]
+    """A column of length n for each metadata key. Integer values (e.g.
+    ``SensorTimestamp``) are int64 and the rest float64. Values missing from a
+    frame are -1 in integer columns and NaN in the others."""
+
+    def __len__(self) -> int:
+        return len(self.arrays)
+
+    @classmethod
+    def empty(
+        cls,
+        n_frames: int,
+        request: CompletedRequest,
+        name: str,
+        metadata_keys: Sequence[str] = BURST_METADATA,
+    ) -> CameraBurst:
+        """Allocate a burst of ``n_frames`` like the named stream of ``request``,
+        with the columns of ``metadata_keys`` that its metadata has."""
+        stream_config = request.get_camera_config().get_stream_config(name)
+        spec = array_spec(stream_config)
+        if spec is None:
+            raise ValueError(f"Can't capture bursts of {stream_config.format}")
+        shape, dtype = spec
+        metadata = request.metadata
+        columns = {}
+        for key in metadata_keys:
+            if key not in metadata:
+                continue
+            if isinstance(metadata[key], (int, np.integer)):
+                columns[key] = np.full(n_frames, -1, dtype=np.int64)
+            else:
+                columns[key] = np.full(n_frames, np.nan, dtype=np.float64)
+        return cls(np.empty((n_frames,) + shape, dtype=dtype), columns)
+
+    def fill(self, index: int, request: CompletedRequest, name: str) -> None:
+        """Write the named stream and metadata of ``request`` into slot ``index``."""
+        request.make_array(name, out=self.arrays[index])
+        metadata = request.metadata
+        for key, column in self.metadata.items():
+            value = metadata.get(key)
+            if value is None:
+                value = -1 if column.dtype == np.int64 else np.nan
+            column[index] = value
+
+    def take(self, indices: np.ndarray | slice) -> CameraBurst:
+        """A new burst of the frames at ``indices`` (a copy, unless a slice)."""
+        return CameraBurst(
+            self.arrays[indices],
+            {key: column[indices] for key, column in self.metadata.items()},
+        )
+
+    def between(self, start: int, stop: int) -> CameraBurst:
+        """The frames with a ``SensorTimestamp`` from ``start`` up to (not including)
+        ``stop`` nanoseconds, as a view. The frames must be in time order."""
+        timestamps = self.metadata["SensorTimestamp"]
+        first, last = np.searchsorted(timestamps, [start, stop])
+        return self.take(slice(first, last))
+
+    def save(self, file) -> None:
+        """Save the burst to a ``.npz`` file (or file object), for ``load``."""
+        np.savez(file, arrays=self.arrays, **self.metadata)
+
+    @classmethod
+    def load(cls, file) -> CameraBurst:
+        with np.load(file) as data:
+            metadata = {key: data[key] for key in data.files if key != "arrays"}
+            return cls(data["arrays"], metadata)
@@ -1,6 +1,6 @@
 import errno
 from logging import getLogger
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional, Tuple
 
 import libcamera
 
@@ -36,13 +36,92 @@ def _convert_from_libcamera_type(value):
     return value
 
 
+def _sequence_or_value(value):
+    if isinstance(value, (tuple, list)):
+        return _convert_from_libcamera_type(value)
+    return value
+
+
+def _rectangle_or_rectangles(value):
+    if isinstance(value, libcamera.Rectangle):
+        return (value.x, value.y, value.width, value.height)
+    return [_rectangle_or_rectangles(v) for v in value]
+
+
+def _size_or_sizes(value):
+    if isinstance(value, libcamera.Size):
+        return (value.width, value.height)
+    return [_size_or_sizes(v) for v in value]
+
+
+# The converter for each control (by name), worked out from its type when first seen.
+_converters: Dict[str, Callable[[Any], Any]] = {}
+
+
+def _converter(control_id) -> Callable[[Any], Any]:
+    converter = _converters.get(control_id.name)
+    if converter is None:
+        if control_id.type == libcamera.ControlType.Rectangle:
+            converter = _rectangle_or_rectangles
+        elif control_id.type == libcamera.ControlType.Size:
+            converter = _size_or_sizes
+        else:
+            converter = _sequence_or_value
+        _converters[control_id.name] = converter
+    return converter
+
+
 def lc_unpack(lc_dict) -> Dict[str, Any]:
     unpacked = {}
     for k, v in lc_dict.items():
-        unpacked[k.name] = _convert_from_libcamera_type(v)
+        unpacked[k.name] = _converter(k)(v)
     return unpacked
 
 
+class LazyMetadata(Mapping[str, Any]):
+    """A read-only mapping of a libcamera ControlList, as ``lc_unpack`` would give,
+    where each value is converted when it is first looked up and then kept.
+
+    Reading a few values (e.g. just ``SensorTimestamp``) then costs a conversion
+    each, instead of one for every control in the list. Values in ``extra`` (which
+    may be added to later) are given alongside the controls.
+    """
+
+    def __init__(self, lc_dict, extra: Optional[Dict[str, Any]] = None):
+        self._lc_dict = lc_dict
+        self._extra = extra if extra is not None else {}
+        self._index: Optional[Dict[str, Tuple[Any, Any]]] = None
+        self._converted: Dict[str, Any] = {}
+
+    def _items(self) -> Dict[str, Tuple[Any, Any]]:
+        if self._index is None:
+            self._index = {k.name: (k, v) for k, v in self._lc_dict.items()}
+        return self._index
+
+    def __getitem__(self, name: str) -> Any:
+        if name in self._extra:
+            return self._extra[name]
+        try:
+            return self._converted[name]
+        except KeyError:
+            pass
+        control_id, value = self._items()[name]
+        value = self._converted[name] = _converter(control_id)(value)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        items = self._items()
+        yield from items
+        yield from (name for name in self._extra if name not in items)
+
+    def __len__(self) -> int:
+        items = self._items()
+        return len(items) + sum(name not in items for name in self._extra)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self)})"
+
+
 def lc_unpack_controls(lc_dict) -> Dict[str, Any]:
     unpacked = {}
     for k, v in lc_dict.items():
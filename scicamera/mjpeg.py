@@ -0,0 +1,120 @@
+"""
+Decoding of MJPEG streams, off the runloop thread.
+
+Decoding a 1080p JPEG can take longer than a frame interval, so decoding each frame
+synchronously (as ``make_array`` does) backs frames up behind it. The ``MjpegDecoder``
+instead copies out the compressed bytes, which are small, and decodes them on a pool of
+threads (PIL releases the GIL while decoding). Frames still come out in the order they
+went in::
+
+    decoder = MjpegDecoder(workers=3, scale=4, callback=show)
+    camera.add_request_callback(decoder.submit_request)
+
+With a ``scale`` of 2, 4 or 8 the JPEG is decoded straight to that fraction of its
+size (with PIL's ``draft``), which is much cheaper than decoding in full and resizing.
+"""
+from __future__ import annotations
+
+import io
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from logging import getLogger
+from typing import Callable, Deque, Optional
+
+import numpy as np
+from PIL import Image
+
+from scicamera.request import CompletedRequest
+
+_log = getLogger(__name__)
+
+MJPEG_SCALES = (1, 2, 4, 8)
+
+
+def decode_mjpeg(data: bytes | np.ndarray, scale: int = 1) -> np.ndarray:
+    """Decode one JPEG frame to an RGB (or greyscale) array.
+
+    ``scale`` is one of ``MJPEG_SCALES``, decoding the image at 1 / ``scale`` of its
+    size. Sizes are rounded up, as JPEG blocks are scaled whole.
+    """
+    if scale not in MJPEG_SCALES:
+        raise ValueError(f"Unsupported MJPEG scale {scale}, use one of {MJPEG_SCALES}")
+    image = Image.open(io.BytesIO(data))
+    if scale != 1:
+        w, h = image.size
+        image.draft(image.mode, (w // scale, h // scale))
+    return np.array(image)
+
+
+class MjpegDecoder:
+    """Decode MJPEG frames on a pool of threads, keeping them in order.
+
+    Each ``submit`` returns a future of the decoded array. If a ``callback`` is given,
+    it is also called with each decoded array, in the order the frames were submitted
+    (from whichever worker thread finished the frame that was next in line).
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        scale: int = 1,
+        callback: Optional[Callable[[np.ndarray], None]] = None,
+    ):
+        if scale not in MJPEG_SCALES:
+            raise ValueError(
+                f"Unsupported MJPEG scale {scale}, use one of {MJPEG_SCALES}"
+            )
+        self.scale = scale
+        self.callback = callback
+        self._pool = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="scicamera-mjpeg"
+        )
+        self._pending: Deque[Future] = deque()
+        self._lock = threading.Lock()
+        self._deliver_lock = threading.Lock()
+
+    def submit(self, data: bytes | np.ndarray) -> Future[np.ndarray]:
+        """Queue a JPEG frame for decoding. ``data`` must not change until it is
+        decoded, so should not be a view of a camera buffer."""
+        with self._lock:
+            future = self._pool.submit(decode_mjpeg, data, self.scale)
+            if self.callback is not None:
+                self._pending.append(future)
+        if self.callback is not None:
+            future.add_done_callback(self._deliver)
+        return future
+
+    def submit_request(
+        self, request: CompletedRequest, name: str = "main"
+    ) -> Future[np.ndarray]:
+        """Queue the named stream of a completed request, copying out its bytes."""
+        return self.submit(request.get_buffer(name))
+
+    def _deliver(self, _: Future) -> None:
+        # Only one thread delivers at a time, taking every finished frame at the head
+        # of the queue, so frames are delivered in order. A frame finishing after the
+        # head was checked gets its own call here, which runs once this one is done.
+        with self._deliver_lock:
+            while True:
+                with self._lock:
+                    if not (self._pending and self._pending[0].done()):
+                        return
+                    future = self._pending.popleft()
+                if future.exception() is not None:
+                    _log.error("Error decoding MJPEG frame: %s", future.exception())
+                    continue
+                try:
+                    self.callback(future.result())
+                except Exception as e:
+                    _log.error(f"Error in MJPEG callback ({self.callback}): {e}")
+
+    def close(self) -> None:
+        """Wait for the queued frames to be decoded (and delivered), then stop."""
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self) -> MjpegDecoder:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
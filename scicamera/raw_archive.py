@@ -0,0 +1,160 @@
+"""
+Recording of raw streams with the packed bytes stored verbatim.
+
+Expanding 10 and 12 bit CSI2P data to uint16 costs 60% / 33% more bytes, and CPU time
+on the acquisition thread. The ``RawRecorder`` instead writes each frame buffer as it
+came from the camera, and the ``RawReader`` only unpacks a frame when it is accessed.
+
+The file layout is a small JSON header followed by one record per frame::
+
+    b"SCIRAW01" | u32 header length | header JSON
+    u32 metadata length | u32 data length | metadata JSON | packed frame bytes
+    ...
+
+The header holds the ``StreamConfig`` (size, format, stride) of the stream. All
+integers are little endian. Metadata passes through JSON, so tuples come back as lists.
+"""
+from __future__ import annotations
+
+import json
+import struct
+from dataclasses import asdict
+from logging import getLogger
+from typing import Any, BinaryIO, Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from scicamera import formats
+from scicamera.configuration import StreamConfig
+from scicamera.request import CompletedRequest
+from scicamera.sensor_format import SensorFormat
+
+_log = getLogger(__name__)
+
+MAGIC = b"SCIRAW01"
+_LENGTH = struct.Struct("<I")
+_RECORD = struct.Struct("<II")
+
+
+class RawRecorder:
+    """Write the packed buffers of a raw stream, and their metadata, to a file.
+
+    ``write_request`` has the signature of a request callback, so recording can be
+    started with ``camera.add_request_callback(recorder.write_request)``.
+    """
+
+    def __init__(self, file: str | BinaryIO, stream_config: StreamConfig):
+        if not formats.is_raw(stream_config.format):
+            raise ValueError(f"Can only record raw formats, not {stream_config.format}")
+        self.stream_config = stream_config
+        self.n_frames = 0
+
+        self._owns_file = isinstance(file, str)
+        self._file = open(file, "wb") if self._owns_file else file
+
+        header = json.dumps({"stream_config": asdict(stream_config)}).encode()
+        self._file.write(MAGIC + _LENGTH.pack(len(header)) + header)
+
+    def write(self, buffer: np.ndarray, metadata: Dict[str, Any]) -> None:
+        """Append one flat uint8 frame buffer and its metadata."""
+        if buffer.dtype != np.uint8 or buffer.ndim != 1:
+            raise ValueError("RawRecorder only accepts flat uint8 buffers")
+        encoded = json.dumps(metadata, default=str).encode()
+        self._file.write(_RECORD.pack(len(encoded), buffer.size) + encoded)
+        self._file.write(memoryview(buffer))
+        self.n_frames += 1
+
+    def write_request(self, request: CompletedRequest, name: str = "raw") -> None:
+        """Append the named stream of a completed request."""
+        self.write(request.get_buffer(name), request.get_metadata())
+
+    def close(self) -> None:
+        if self._owns_file:
+            self._file.close()
+        else:
+            self._file.flush()
+        _log.info("Recorded %d raw frames", self.n_frames)
+
+    def __enter__(self) -> RawRecorder:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class RawReader:
+    """Random access to the frames of a file written by a ``RawRecorder``.
+
+    The file is memory mapped, and frames are only unpacked (with ``unpack_raw``)
+    when they are indexed. ``packed`` gives the stored bytes without unpacking.
+    """
+
+    def __init__(self, path: str, workers: int = 1):
+        self.workers = workers
+        self._data = np.memmap(path, dtype=np.uint8, mode="r")
+
+        if self._data[: len(MAGIC)].tobytes() != MAGIC:
+            raise ValueError(f"{path} is not a raw recording")
+        offset = len(MAGIC)
+        (header_length,) = _LENGTH.unpack_from(self._data, offset)
+        offset += _LENGTH.size
+        header = json.loads(self._data[offset : offset + header_length].tobytes())
+        offset += header_length
+
+        stream_config = header["stream_config"]
+        stream_config["size"] = tuple(stream_config["size"])
+        self.stream_config = StreamConfig(**stream_config)
+        self.sensor_format = SensorFormat(self.stream_config.format)
+
+        # (metadata offset, metadata length, data offset, data length) per frame
+        self._index: List[Tuple[int, int, int, int]] = []
+        while offset + _RECORD.size <= self._data.size:
+            metadata_length, data_length = _RECORD.unpack_from(self._data, offset)
+            metadata_offset = offset + _RECORD.size
+            data_offset = metadata_offset + metadata_length
+            if data_offset + data_length > self._data.size:
+                _log.warning("Ignoring truncated frame %d", len(self._index))
+                break
+            self._index.append(
+                (metadata_offset, metadata_length, data_offset, data_length)
+            )
+            offset = data_offset + data_length
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def packed(self, index: int) -> np.ndarray:
+        """The stored (still packed) bytes of a frame, as a read-only view."""
+        _, _, data_offset, data_length = self._index[index]
+        return self._data[data_offset : data_offset + data_length]
+
+    def metadata(self, index: int) -> Dict[str, Any]:
+        metadata_offset, metadata_length, _, _ = self._index[index]
+        return json.loads(
+            self._data[metadata_offset : metadata_offset + metadata_length].tobytes()
+        )
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        """Unpack a frame to a 2d array, in the same way as ``make_array("raw")``."""
+        w, h = self.stream_config.size
+        return formats.unpack_raw(
+            np.asarray(self.packed(index)),
+            (h, w),
+            self.sensor_format,
+            stride=self.stream_config.stride,
+            workers=self.workers,
+        )
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def close(self) -> None:
+        self._index = []
+        self._data = None
+
+    def __enter__(self) -> RawReader:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
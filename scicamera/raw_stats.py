@@ -0,0 +1,93 @@
+"""
+Exposure statistics computed straight from raw buffers.
+
+Monitoring exposure only needs per channel histograms, means and the fraction of
+clipped pixels, so :func:`raw_stats` never makes the full uint16 frame. Packed rows
+are decoded a band at a time into a small scratch array and counted into a histogram
+at the full bit depth, from which everything else is derived. ``row_step`` samples only
+one Bayer row pair (or mono row) in every ``row_step`` for cheaper, approximate stats.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+from scicamera.formats import BAYER_PLANES, bayer_plane_indices, iter_raw_rows
+from scicamera.sensor_format import SensorFormat
+
+
+@dataclass
+class RawStats:
+    channels: Tuple[str, ...]
+    """The channel names: ``BAYER_PLANES`` for Bayer formats, ``("Y",)`` for mono."""
+
+    histograms: np.ndarray
+    """Pixel counts of shape (channels, bins), the bins evenly spanning the bit depth."""
+
+    means: np.ndarray
+    """Mean pixel value of each channel."""
+
+    clipped_fraction: np.ndarray
+    """Fraction of the pixels of each channel at or above the white level."""
+
+    n_pixels: int
+    """The number of pixels sampled per channel."""
+
+
+def raw_stats(
+    raw: np.ndarray,
+    pixel_shape: Tuple[int, int],
+    fmt: SensorFormat,
+    stride: Optional[int] = None,
+    bins: int = 256,
+    row_step: int = 1,
+    white_level: Optional[int] = None,
+) -> RawStats:
+    """Compute per channel histograms, means and clipped fractions of a raw buffer.
+
+    ``raw``, ``pixel_shape``, ``fmt`` and ``stride`` are as for ``unpack_raw``. ``bins``
+    must divide the number of levels of the format, and ``white_level`` defaults to
+    the largest value it can hold.
+    """
+    levels = 1 << fmt.bit_depth
+    if bins > levels or levels % bins:
+        raise ValueError(f"{bins} bins do not evenly divide {levels} levels")
+    if white_level is None:
+        white_level = levels - 1
+    if row_step < 1:
+        raise ValueError(f"row_step must be at least 1, got {row_step}")
+
+    height, width = pixel_shape
+    if fmt.mono:
+        channels, tile, plane_indices = ("Y",), 1, [0]
+    else:
+        channels, tile = BAYER_PLANES, 2
+        plane_indices = bayer_plane_indices(fmt.bayer_order)
+        if height % 2 or width % 2:
+            raise ValueError(f"Bayer images must have even dimensions: {pixel_shape}")
+
+    counts = np.zeros((len(channels), levels), dtype=np.int64)
+    for row_parity in range(tile):
+        bands = iter_raw_rows(
+            raw, pixel_shape, fmt, stride, start=row_parity, step=tile * row_step
+        )
+        for band in bands:
+            for col_parity in range(tile):
+                channel = plane_indices[tile * row_parity + col_parity]
+                values = band[:, col_parity::tile].ravel()
+                if fmt.packing is None and values.dtype != np.uint8:
+                    # 16 bit containers may hold bits above the bit depth
+                    values = np.minimum(values, levels - 1)
+                counts[channel] += np.bincount(values, minlength=levels)
+
+    n_sampled = int(counts[0].sum())
+    totals = np.maximum(counts.sum(axis=1), 1)
+    return RawStats(
+        channels=channels,
+        histograms=counts.reshape((len(channels), bins, -1)).sum(axis=2),
+        means=counts @ np.arange(levels, dtype=np.float64) / totals,
+        clipped_fraction=counts[:, white_level:].sum(axis=1) / totals,
+        n_pixels=n_sampled,
+    )
@@ -4,45 +4,70 @@ import io
 import mmap
 import threading
 import time
+import weakref
 from abc import ABC, abstractmethod
+from collections import ChainMap
 from concurrent.futures import Future
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from functools import partial
 from logging import getLogger
-from typing import Any, Callable, Dict
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional, Tuple
 
+import libcamera
 import numpy as np
 from PIL import Image
 
 import scicamera.formats as formats
 from scicamera import formats
-from scicamera.configuration import CameraConfig
+from scicamera.configuration import CameraConfig, StreamConfig
+from scicamera.converters import (
+    YUV2RGB_JPEG,
+    YUV2RGB_REC709,
+    YUV2RGB_SMPTE170M,
+    YUV_to_RGB,
+)
 from scicamera.formats import unpack_raw
-from scicamera.lc_helpers import lc_unpack
+from scicamera.lc_helpers import LazyMetadata, libcamera_color_spaces_eq
 from scicamera.sensor_format import SensorFormat
 
 _log = getLogger(__name__)
 
 
+def _bytes_used(lc_buffer) -> int:
+    """The number of bytes of a frame buffer holding this frame's data."""
+    # bytes_used is the same as p.length for regular frames, but correctly reflects
+    # the compressed image size for MJPEG cameras.
+    return sum(p_metadata.bytes_used for p_metadata in lc_buffer.metadata.planes)
+
+
+def _contiguous_fd(lc_buffer) -> int:
+    """The file descriptor holding all the planes of a frame buffer."""
+    fd = lc_buffer.planes[0].fd
+    for p in lc_buffer.planes:
+        if fd != p.fd:
+            raise RuntimeError("_MappedBuffer: Cannot map non-contiguous buffer!")
+    return fd
+
+
+def _map_fd(fd: int, length: int) -> mmap.mmap:
+    return mmap.mmap(fd, length, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+
+
 class MappedBuffer:
     def __init__(self, lc_buffer):
         self.__fb = lc_buffer
+        self.__mm = None
+
+    def map(self) -> mmap.mmap:
+        """Map the buffer, returning an ``mmap`` that is unmapped once it is closed
+        or garbage collected."""
+        fd = _contiguous_fd(self.__fb)
+        return _map_fd(fd, _bytes_used(self.__fb))
 
     def __enter__(self):
-        # Check if the buffer is contiguous and find the total length.
-        fd = self.__fb.planes[0].fd
-        planes_metadata = self.__fb.metadata.planes
-        buflen = 0
-        for p, p_metadata in zip(self.__fb.planes, planes_metadata):
-            # bytes_used is the same as p.length for regular frames, but correctly reflects
-            # the compressed image size for MJPEG cameras.
-            buflen = buflen + p_metadata.bytes_used
-            if fd != p.fd:
-                raise RuntimeError("_MappedBuffer: Cannot map non-contiguous buffer!")
-
-        self.__mm = mmap.mmap(
-            fd, buflen, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE
-        )
+        self.__mm = self.map()
         return self.__mm
 
     def __exit__(self, exc_type, exc_value, exc_traceback):
@@ -50,7 +75,83 @@ class MappedBuffer:
             self.__mm.close()
 
 
+def _yuv_matrix(color_space) -> np.ndarray:
+    """The YUV to RGB matrix for a libcamera colour space, defaulting to full range."""
+    if color_space is not None:
+        if libcamera_color_spaces_eq(color_space, libcamera.ColorSpace.Smpte170m()):
+            return YUV2RGB_SMPTE170M
+        if libcamera_color_spaces_eq(color_space, libcamera.ColorSpace.Rec709()):
+            return YUV2RGB_REC709
+    return YUV2RGB_JPEG
+
+
+class BufferMapCache:
+    """Mappings of frame buffers which persist from one frame to the next.
+
+    The buffers of a configuration are fixed until the camera is reconfigured, so
+    rather than calling ``mmap``/``munmap`` for every stream of every frame, each
+    buffer is mapped once (in full) and the mapping reused. Mappings are keyed by the
+    dmabuf fd and plane layout of the buffer.
+    """
+
+    def __init__(self):
+        self._maps: Dict[Tuple[Tuple[int, int, int], ...], mmap.mmap] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._maps)
+
+    @staticmethod
+    def _key(lc_buffer) -> Tuple[Tuple[int, int, int], ...]:
+        return tuple((p.fd, p.offset, p.length) for p in lc_buffer.planes)
+
+    def _get(self, lc_buffer) -> mmap.mmap:
+        key = self._key(lc_buffer)
+        with self._lock:
+            mm = self._maps.get(key)
+            if mm is None:
+                length = sum(p.length for p in lc_buffer.planes)
+                mm = self._maps[key] = _map_fd(_contiguous_fd(lc_buffer), length)
+            return mm
+
+    def populate(self, lc_buffers) -> None:
+        """Map the given buffers ahead of time (e.g. when they are allocated)."""
+        for lc_buffer in lc_buffers:
+            self._get(lc_buffer)
+
+    def array(self, lc_buffer) -> np.ndarray:
+        """A 1d uint8 array over the bytes of this frame in the buffer, without copying.
+
+        The mapping stays valid while the array (or any view of it) is alive, even
+        once the cache is closed, though the contents belong to whichever frame the
+        camera last wrote to the buffer.
+        """
+        mm = self._get(lc_buffer)
+        return np.frombuffer(mm, dtype=np.uint8, count=_bytes_used(lc_buffer))
+
+    def close(self) -> None:
+        """Drop all the mappings, e.g. because the buffers are about to be freed."""
+        with self._lock:
+            maps, self._maps = self._maps, {}
+        for mm in maps.values():
+            try:
+                mm.close()
+            except BufferError:
+                # Arrays still view this mapping, it is unmapped when they are freed
+                pass
+
+
+SHARED_PRODUCTS = ("buffer", "array", "image", "metadata")
+
+
 class AbstractCompletedRequest(ABC):
+    def __init__(self):
+        # The products of get_shared, each made by the first caller asking for it
+        self._shared: Dict[Tuple[str, Optional[str]], Future] = {}
+        self._shared_lock = threading.Lock()
+        # Values added to the metadata, rather than from the camera
+        self._extra_metadata: Dict[str, Any] = {}
+
     @abstractmethod
     def get_camera_config(self) -> CameraConfig:
         raise NotImplementedError()
@@ -63,31 +164,156 @@ class AbstractCompletedRequest(ABC):
     def get_metadata(self) -> Dict[str, Any]:
         raise NotImplementedError()
 
-    def make_array(self, name: str) -> np.ndarray:
-        """Make a 2d numpy array from the named stream's buffer."""
+    @property
+    def metadata(self) -> Mapping[str, Any]:
+        """The metadata, as a read-only mapping which is only valid while this request
+        is held. Cheaper than ``get_metadata`` for reading a few values."""
+        return MappingProxyType(ChainMap(self._extra_metadata, self.get_metadata()))
+
+    @property
+    def sequence(self) -> Optional[int]:
+        """The frame sequence number of the request's buffers, if known."""
+        return None
+
+    def _add_metadata(self, name: str, value: Any) -> None:
+        """Add a value (not from the camera) to the metadata."""
+        self._extra_metadata[name] = value
+
+    def _map_buffer(self, name: str) -> Tuple[np.ndarray, Callable[[], None]]:
+        """Return a 1d array of the named stream's buffer, and a callable which
+        releases any hold it has on this request. By default this is just a copy."""
+        return self.get_buffer(name), lambda: None
+
+    def get_buffer_view(self, name: str) -> np.ndarray:
+        """Make a read-only 1d numpy array of the named stream's buffer, without copying.
+
+        The array holds a reference to this request (stopping it being recycled) until
+        it, and every view made from it, is garbage collected. So only keep it for as
+        long as needed, or use ``buffer_view`` to release the request explicitly.
+        """
+        array, _ = self._map_buffer(name)
+        return array
+
+    @contextmanager
+    def buffer_view(self, name: str) -> Iterator[np.ndarray]:
+        """Context manager giving a zero-copy array of the named stream's buffer.
+
+        The request is released on exit, after which the camera may reuse the buffer,
+        so the contents of the array (and any views of it) are no longer defined.
+        """
+        array, release = self._map_buffer(name)
+        try:
+            yield array
+        finally:
+            release()
+
+    def get_shared(self, product: str, name: Optional[str] = None) -> Any:
+        """Get a product of this request which is made once and shared by every caller.
+
+        ``product`` is one of ``SHARED_PRODUCTS``: the ``"buffer"``, ``"array"`` or
+        ``"image"`` of the named stream, or the ``"metadata"``. So when several request
+        callbacks (and capture tasks) want the same stream as an array, it is only
+        unpacked and copied once. Callers asking for a product being made wait for it,
+        but not for other products.
+
+        As the products are shared, arrays are read-only and the metadata a read-only
+        mapping. The image must not be modified either (``copy`` it to do so). The
+        products are dropped when the request is finally released.
+        """
+        if product not in SHARED_PRODUCTS:
+            raise ValueError(f"Unknown product {product}, use one of {SHARED_PRODUCTS}")
+        key = (product, name)
+        with self._shared_lock:
+            future = self._shared.get(key)
+            making = future is None
+            if making:
+                future = self._shared[key] = Future()
+        if not making:
+            return future.result()
+
+        try:
+            if product == "metadata":
+                value = MappingProxyType(self.get_metadata())
+            elif product == "buffer":
+                value = self.get_buffer(name)
+            elif product == "array":
+                value = self.make_array(name)
+            else:
+                value = self.make_image(name)
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+        except Exception as e:
+            # Let a later caller try again
+            with self._shared_lock:
+                self._shared.pop(key, None)
+            future.set_exception(e)
+            raise
+        future.set_result(value)
+        return value
+
+    def make_array(
+        self,
+        name: str,
+        roi: Optional[Tuple[int, int, int, int]] = None,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Make a 2d numpy array from the named stream's buffer.
+
+        For raw streams, ``roi`` may give an (x, y, width, height) region of interest,
+        in which case only that region of the image is decoded. The image is written to
+        ``out`` if given (e.g. from an ``ArrayPool``), which must be of the right shape.
+        """
         config = self.get_camera_config()
         stream_cfg = config.get_stream_config(name)
+        if roi is not None and not formats.is_raw(stream_cfg.format):
+            raise ValueError("Region of interest is only supported for raw streams")
+
+        with self.buffer_view(name) as array:
+            image = self._make_array(array, config, stream_cfg, roi, out)
+            if out is not None and image is not out:
+                if image.shape != out.shape or image.dtype != out.dtype:
+                    raise ValueError(
+                        f"Output array must be {image.dtype} of shape {image.shape}, "
+                        f"got {out.dtype} of shape {out.shape}"
+                    )
+                np.copyto(out, image)
+                image = out
+            # The conversions below that do not need to copy would otherwise hand back
+            # a view of the camera's buffer, so copy those out while it is still ours.
+            elif not array.flags.owndata and np.may_share_memory(image, array):
+                image = image.copy()
+        return image
+
+    def _make_array(
+        self,
+        array: np.ndarray,
+        config: CameraConfig,
+        stream_cfg: StreamConfig,
+        roi: Optional[Tuple[int, int, int, int]],
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
         w, h = stream_cfg.size
         stride = stream_cfg.stride
         fmt = stream_cfg.format
 
-        array = self.get_buffer(name)
-
         # Turning the 1d array into a 2d image-like array only works if the
         # image stride (which is in bytes) is a whole number of pixels. Even
         # then, if they don't match exactly you will get "padding" down the RHS.
-        # Working around this requires another expensive copy of all the data.
+        # Working around this requires another expensive copy of all the data, unless
+        # there is an output array to copy the image (without its padding) into anyway.
         if fmt in ("BGR888", "RGB888"):
             if stride != w * 3:
-                array = array.reshape((h, stride))
-                array = np.asarray(array[:, : w * 3], order="C")
+                array = array.reshape((h, stride))[:, : w * 3]
+                if out is None:
+                    array = np.asarray(array, order="C")
             image = array.reshape((h, w, 3))
         elif fmt in ("XBGR8888", "XRGB8888"):
             if stride != w * 4:
-                array = array.reshape((h, stride))
-                array = np.asarray(array[:, : w * 4], order="C")
+                array = array.reshape((h, stride))[:, : w * 4]
+                if out is None:
+                    array = np.asarray(array, order="C")
             image = array.reshape((h, w, 4))
-        elif fmt in ("YUV420", "YVU420"):
+        elif fmt in ("YUV420", "YVU420", "NV12", "NV21"):
             # Returning YUV420 as an image of 50% greater height (the extra bit continaing
             # the U/V data) is useful because OpenCV can convert it to RGB for us quite
             # efficiently. We leave any packing in there, however, as it would be easier
@@ -100,7 +326,9 @@ class AbstractCompletedRequest(ABC):
         elif fmt == "MJPEG":
             image = np.array(Image.open(io.BytesIO(array)))
         elif formats.is_raw(fmt):
-            image = unpack_raw(array, (h, w), SensorFormat(fmt))
+            image = unpack_raw(
+                array, (h, w), SensorFormat(fmt), stride=stride, out=out, roi=roi
+            )
         else:
             raise RuntimeError("Format " + config.format + " not supported")
         return image
@@ -109,8 +337,18 @@ class AbstractCompletedRequest(ABC):
         """Make a PIL image from the named stream's buffer."""
         fmt = self.get_camera_config().get_stream_config(name).format
         if fmt == "MJPEG":
-            buffer = self.get_buffer(name)
-            return Image.open(io.BytesIO(buffer))
+            # BytesIO takes its own copy of the data, so no need to make another
+            with self.buffer_view(name) as buffer:
+                return Image.open(io.BytesIO(buffer))
+
+        if formats.is_YUV(fmt):
+            stream_cfg = self.get_camera_config().get_stream_config(name)
+            matrix = _yuv_matrix(self.get_camera_config().color_space)
+            with self.buffer_view(name) as buffer:
+                rgb = YUV_to_RGB(
+                    buffer, stream_cfg.size, fmt, stream_cfg.stride, matrix, False
+                )
+            return Image.fromarray(rgb, "RGB")
 
         rgb = self.make_array(name)
         mode_lookup = {
@@ -136,6 +374,7 @@ class CompletedRequest(AbstractCompletedRequest):
         config: CameraConfig,
         stream_map: Dict[str, Any],
         cleanup: Callable[[], None],
+        buffer_maps: Optional[BufferMapCache] = None,
     ):
         self.completion_time = time.time()
         self.request = lc_request
@@ -144,6 +383,9 @@ class CompletedRequest(AbstractCompletedRequest):
         self.config = config
         self.cleanup = cleanup
         self.stream_map = stream_map
+        self.buffer_maps = buffer_maps
+        super().__init__()
+        self._metadata: Optional[LazyMetadata] = None
 
     def acquire(self):
         """Acquire a reference to this completed request, which stops it being recycled back to
@@ -168,6 +410,7 @@ class CompletedRequest(AbstractCompletedRequest):
 
             self.cleanup()
             self.request = None
+            self._shared.clear()
 
     def get_camera_config(self) -> CameraConfig:
         """Fetch the configuration for the named stream."""
@@ -177,12 +420,46 @@ class CompletedRequest(AbstractCompletedRequest):
         """Make a 1d numpy array from the named stream's buffer."""
         stream = self.stream_map[name]
         buffer = self.request.buffers[stream]
+        if self.buffer_maps is not None:
+            return self.buffer_maps.array(buffer).copy()
         with MappedBuffer(buffer) as b:
             return np.array(b, dtype=np.uint8)
 
+    def _map_buffer(self, name: str) -> Tuple[np.ndarray, Callable[[], None]]:
+        stream = self.stream_map[name]
+        self.acquire()
+        try:
+            buffer = self.request.buffers[stream]
+            if self.buffer_maps is not None:
+                array = self.buffer_maps.array(buffer)
+            else:
+                array = np.frombuffer(MappedBuffer(buffer).map(), dtype=np.uint8)
+        except Exception:
+            self.release()
+            raise
+
+        # Release the request (once) when the array is garbage collected, which
+        # only happens after every view of it has gone, or earlier if asked.
+        release = weakref.finalize(array, self.release)
+        array.flags.writeable = False
+        return array, release
+
+    @property
+    def metadata(self) -> Mapping[str, Any]:
+        if self._metadata is None:
+            self._metadata = LazyMetadata(self.request.metadata, self._extra_metadata)
+        return self._metadata
+
+    @property
+    def sequence(self) -> Optional[int]:
+        # Every buffer of a request is from the same sensor frame
+        for buffer in self.request.buffers.values():
+            return buffer.metadata.sequence
+        return None
+
     def get_metadata(self) -> Dict[str, Any]:
         """Fetch the metadata corresponding to this completed request."""
-        return lc_unpack(self.request.metadata)
+        return dict(self.metadata)
 
 
 @dataclass
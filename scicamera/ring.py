@@ -0,0 +1,160 @@
+"""
+Pre-trigger recording of a stream into a ring of preallocated frames.
+
+To catch rare events without streaming to disk all the time, a ``RingRecorder`` keeps
+the last frames of a stream (and their metadata) in memory. Each frame is copied into
+the next slot of one preallocated ``CameraBurst``, so the camera's buffer is released
+straight away. ``trigger`` then gives the ``n_before`` frames from before it and the
+``n_after`` frames following it::
+
+    recorder = RingRecorder(camera, "main", n_before=60, n_after=30)
+    ...
+    burst = recorder.trigger("event.npz").result()
+
+Once the frames after the trigger are in, recording pauses only while they are copied
+out, on another thread so the runloop is not held up by it. Writing the copy to a file
+happens after recording has resumed.
+"""
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future
+from logging import getLogger
+from typing import TYPE_CHECKING, Optional, Sequence
+
+import numpy as np
+
+from scicamera.frame import BURST_METADATA, CameraBurst
+from scicamera.request import CompletedRequest
+from scicamera.typing import TypedFuture
+
+if TYPE_CHECKING:
+    from scicamera.actions import RequestMachinery
+
+_log = getLogger(__name__)
+
+
+class RingRecorder:
+    """Keep the last ``n_before + n_after`` frames of the named stream."""
+
+    def __init__(
+        self,
+        camera: RequestMachinery,
+        name: str = "main",
+        n_before: int = 30,
+        n_after: int = 0,
+        metadata_keys: Sequence[str] = BURST_METADATA,
+    ):
+        if n_before < 0 or n_after < 0 or n_before + n_after < 1:
+            raise ValueError(f"Can't keep {n_before} frames before and {n_after} after")
+        self.name = name
+        self.n_before = n_before
+        self.n_after = n_after
+        self.capacity = n_before + n_after
+        self.metadata_keys = list(metadata_keys)
+        if "SensorTimestamp" not in self.metadata_keys:
+            self.metadata_keys.append("SensorTimestamp")
+
+        self._camera = camera
+        self._ring: Optional[CameraBurst] = None
+        self._next = 0  # the slot the next frame goes in
+        self._count = 0  # the number of slots holding frames
+        self._pending: Optional[TypedFuture[CameraBurst]] = None
+        self._remaining = 0  # frames to go after the trigger
+        self._file = None
+        self._paused = False
+        self._lock = threading.Lock()
+        camera.add_request_callback(self._on_request)
+
+    def __len__(self) -> int:
+        """The number of frames held."""
+        return self._count
+
+    def _on_request(self, request: CompletedRequest) -> None:
+        with self._lock:
+            if self._paused:
+                return
+            if self._ring is None:
+                self._ring = CameraBurst.empty(
+                    self.capacity, request, self.name, self.metadata_keys
+                )
+            self._ring.fill(self._next, request, self.name)
+            self._next = (self._next + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+            if self._pending is not None:
+                self._remaining -= 1
+                if self._remaining == 0:
+                    self._finish()
+
+    def _ordered(self) -> CameraBurst:
+        """Copy out the frames held, oldest first."""
+        indices = (self._next - self._count + np.arange(self._count)) % self.capacity
+        return self._ring.take(indices)
+
+    def _finish(self) -> None:
+        # Called with the lock held. Nothing is written while paused, so the frames
+        # can be copied out without the lock, off the runloop. The copy is independent
+        # of the ring, so recording resumes before it is saved.
+        self._paused = True
+        future, file = self._pending, self._file
+        self._pending, self._file = None, None
+
+        def finish():
+            burst, error = None, None
+            try:
+                burst = self._ordered()
+            except Exception as e:
+                _log.error(f"Error copying triggered frames: {e}")
+                error = e
+            # Recording resumes before the future is done, so no frame delivered
+            # after it is done is missed
+            with self._lock:
+                self._paused = False
+            if file is not None and error is None:
+                try:
+                    burst.save(file)
+                except Exception as e:
+                    _log.error(f"Error saving triggered frames: {e}")
+                    error = e
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(burst)
+
+        threading.Thread(target=finish, daemon=True).start()
+
+    def trigger(self, file=None) -> TypedFuture[CameraBurst]:
+        """Get the ``n_before`` frames up to now and the ``n_after`` frames to come,
+        oldest first, in a future. If a ``file`` is given, they are saved to it first
+        (see ``CameraBurst.save``). Triggering again before that future is done gives
+        the same future.
+        """
+        with self._lock:
+            if self._pending is not None:
+                return self._pending
+            future: TypedFuture[CameraBurst] = Future()
+            if self.n_after == 0 and self._ring is None:
+                future.set_exception(RuntimeError("No frames have been recorded yet"))
+                return future
+            self._pending, self._remaining, self._file = future, self.n_after, file
+            if self.n_after == 0:
+                self._finish()
+            return future
+
+    def snapshot(self) -> CameraBurst:
+        """A copy of the frames held now, oldest first, e.g. to take ``between`` two
+        sensor timestamps of."""
+        with self._lock:
+            if self._ring is None:
+                raise RuntimeError("No frames have been recorded yet")
+            return self._ordered()
+
+    def close(self) -> None:
+        """Stop recording."""
+        self._camera.remove_request_callback(self._on_request)
+
+    def __enter__(self) -> RingRecorder:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
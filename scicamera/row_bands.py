@@ -0,0 +1,51 @@
+"""
+Splitting work on an image into bands of rows, run on a shared thread pool.
+
+NumPy releases the GIL in most ufuncs, so decoding (or converting) the bands of a frame
+on several threads runs in parallel. All of them share one process wide pool, which is
+grown to the most workers asked for, up to the number of CPUs.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+DECODE_POOL_MAX = os.cpu_count() or 1
+_shared_decode_pool: Optional[ThreadPoolExecutor] = None
+_decode_pool_size = 0
+_decode_pool_lock = threading.Lock()
+
+
+def decode_pool(workers: int) -> ThreadPoolExecutor:
+    """The process wide thread pool shared by all decodes, grown to the most
+    ``workers`` asked for (up to the number of CPUs)."""
+    global _shared_decode_pool, _decode_pool_size
+    workers = min(workers, DECODE_POOL_MAX)
+    with _decode_pool_lock:
+        if _shared_decode_pool is None or workers > _decode_pool_size:
+            # A smaller pool being replaced may still be in use, so it isn't shut
+            # down: its threads exit once it is no longer referenced.
+            _shared_decode_pool = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="scicamera-decode"
+            )
+            _decode_pool_size = workers
+        return _shared_decode_pool
+
+
+def run_in_row_bands(
+    decode: Callable[[slice], None], n_rows: int, workers: int
+) -> None:
+    """Call ``decode`` over row bands covering ``n_rows``, using ``workers`` threads.
+
+    NumPy releases the GIL in the decoding ufuncs, so the bands decode in parallel.
+    """
+    n_bands = max(1, min(workers, n_rows))
+    if n_bands == 1:
+        decode(slice(0, n_rows))
+        return
+
+    edges = [n_rows * i // n_bands for i in range(n_bands + 1)]
+    pool = decode_pool(workers)
+    futures = [pool.submit(decode, slice(a, b)) for a, b in zip(edges, edges[1:])]
+    for future in futures:
+        future.result()
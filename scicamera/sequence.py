@@ -0,0 +1,79 @@
+"""
+Counting the frames a camera dropped.
+
+The sensor keeps running at its frame rate whether or not there is a buffer free for
+each frame, so when the frames are not processed fast enough some are silently lost.
+A ``FrameSequence`` notices the gaps they leave: in the buffers' frame sequence numbers
+where libcamera gives them, and otherwise in the ``SensorTimestamp``, where a gap of
+more than half a ``FrameDuration`` beyond the expected one is a frame lost.
+
+Each camera keeps one as ``camera.frame_sequence``, and puts the number of frames lost
+just before each frame in its metadata as ``dropped_before``::
+
+    if camera.frame_sequence.dropped > alarm_threshold:
+        ...
+"""
+from __future__ import annotations
+
+from logging import getLogger
+from typing import Optional
+
+_log = getLogger(__name__)
+
+
+class FrameSequence:
+    """Counters of the frames delivered, and of the frames lost between them."""
+
+    def __init__(self):
+        self.frames = 0
+        """The number of frames delivered."""
+        self.dropped = 0
+        """The number of frames lost between them."""
+        self.gaps = 0
+        """The number of times one or more frames were lost."""
+        self.max_gap = 0
+        """The most frames lost in one go."""
+        self._last_timestamp: Optional[int] = None
+        self._last_sequence: Optional[int] = None
+
+    @property
+    def drop_rate(self) -> float:
+        """The fraction of the sensor's frames which were lost."""
+        total = self.frames + self.dropped
+        return self.dropped / total if total else 0.0
+
+    def restart(self) -> None:
+        """Forget the last frame, as when the camera is stopped and started again, so
+        the time in between does not count as frames lost. The counters carry on."""
+        self._last_timestamp = None
+        self._last_sequence = None
+
+    def update(
+        self,
+        timestamp: Optional[int],
+        frame_duration: Optional[int] = None,
+        sequence: Optional[int] = None,
+    ) -> int:
+        """Count the next frame, returning the number of frames lost just before it.
+
+        :param timestamp: The frame's ``SensorTimestamp``, in nanoseconds
+        :param frame_duration: The frame's ``FrameDuration``, in microseconds
+        :param sequence: The frame's sequence number, if known
+        """
+        dropped = 0
+        if sequence is not None and self._last_sequence is not None:
+            dropped = max(sequence - self._last_sequence - 1, 0)
+        elif timestamp is not None and self._last_timestamp is not None:
+            if frame_duration:
+                elapsed = timestamp - self._last_timestamp
+                dropped = max(round(elapsed / (frame_duration * 1000)) - 1, 0)
+
+        self.frames += 1
+        if dropped:
+            self.dropped += dropped
+            self.gaps += 1
+            self.max_gap = max(self.max_gap, dropped)
+            _log.debug(f"Dropped {dropped} frames before the frame at {timestamp}")
+        self._last_timestamp = timestamp
+        self._last_sequence = sequence
+        return dropped
@@ -0,0 +1,126 @@
+"""
+Iterating over every frame of a stream, through a bounded queue.
+
+A request callback runs on the runloop, so a slow one holds up every frame after it.
+A ``FrameStream`` (from ``camera.stream``) instead queues up frames for a consumer on
+another thread, and when the consumer falls behind and the queue is full it follows
+one of the ``STREAM_POLICIES``:
+
+- ``"drop_oldest"``: drop the oldest queued frame to make room for the new one.
+- ``"drop_newest"``: drop the new frame (without converting it).
+- ``"block"``: hold up the runloop until there is room, so no frames are lost here,
+  but the camera may run out of buffers and drop frames itself. The stream is closed
+  (unblocking the runloop) when the camera is stopped or closed.
+
+The number of frames dropped is kept in ``dropped``::
+
+    with camera.stream("main", maxsize=4) as frames:
+        for frame in frames:
+            process(frame)
+"""
+from __future__ import annotations
+
+import threading
+from collections import deque
+from typing import TYPE_CHECKING, Deque, Iterator, Optional
+
+from scicamera.frame import CameraFrame
+from scicamera.request import CompletedRequest
+
+if TYPE_CHECKING:
+    from scicamera.actions import RequestMachinery
+
+STREAM_POLICIES = ("drop_oldest", "drop_newest", "block")
+
+
+class FrameStream:
+    """An iterator over the CameraFrames of a stream, from when it was made until it is
+    closed. ``timeout`` is how long to wait for each frame before a TimeoutError."""
+
+    def __init__(
+        self,
+        camera: RequestMachinery,
+        name: str = "main",
+        maxsize: int = 4,
+        policy: str = "drop_oldest",
+        timeout: Optional[float] = None,
+    ):
+        if policy not in STREAM_POLICIES:
+            raise ValueError(f"Unknown policy {policy}, use one of {STREAM_POLICIES}")
+        if maxsize < 1:
+            raise ValueError(f"maxsize must be at least 1, got {maxsize}")
+        self.name = name
+        self.maxsize = maxsize
+        self.policy = policy
+        self.timeout = timeout
+
+        self.received = 0
+        """The number of frames the camera delivered to the stream."""
+        self.dropped = 0
+        """The number of those which were dropped by the policy."""
+
+        self._camera = camera
+        self._frames: Deque[CameraFrame] = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        camera.add_request_callback(self._on_request)
+
+    def _has_room(self) -> bool:
+        return self._closed or len(self._frames) < self.maxsize
+
+    def _on_request(self, request: CompletedRequest) -> None:
+        with self._cond:
+            if self._closed:
+                return
+            self.received += 1
+            if not self._has_room():
+                if self.policy == "drop_newest":
+                    self.dropped += 1
+                    return
+                if self.policy == "block":
+                    self._cond.wait_for(self._has_room)
+                    if self._closed:
+                        return
+
+        # Only the runloop adds frames, so there can only be less queued by now
+        frame = CameraFrame.from_request(self.name, request)
+        with self._cond:
+            if len(self._frames) >= self.maxsize:
+                self._frames.popleft()
+                self.dropped += 1
+            self._frames.append(frame)
+            self._cond.notify_all()
+
+    def __iter__(self) -> Iterator[CameraFrame]:
+        return self
+
+    def __next__(self) -> CameraFrame:
+        with self._cond:
+            if not self._cond.wait_for(
+                lambda: self._frames or self._closed, self.timeout
+            ):
+                raise TimeoutError(f"No frame from {self.name} in {self.timeout}s")
+            if not self._frames:
+                raise StopIteration
+            frame = self._frames.popleft()
+            self._cond.notify_all()
+            return frame
+
+    def qsize(self) -> int:
+        """The number of frames waiting to be consumed."""
+        return len(self._frames)
+
+    def close(self) -> None:
+        """Stop receiving frames. Frames already queued can still be iterated over."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._camera.remove_request_callback(self._on_request)
+
+    def __enter__(self) -> FrameStream:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -17,18 +17,23 @@ def calibrate_camera_offset(
     ``SensorTimestamp`` to get the epoch time in nanoseconds.
     """
     deltas = []
+    dropped_at_start = camera.frame_sequence.dropped
 
     def _capture_timing_callback(request: CompletedRequest):
         # This is the time the request was handed to python
         epoch_nanos = int(request.completion_time * 1_000_000_000)
         # This is the time the "sensor" reports `ktime_get_ns()` in the kernel
-        sensor_nanos = request.get_metadata()["SensorTimestamp"]
+        sensor_nanos = request.metadata["SensorTimestamp"]
         deltas.append(epoch_nanos - sensor_nanos)
 
     # Make sure the above callback happens at least `n_frames` times
     camera.add_request_callback(_capture_timing_callback)
     camera.discard_frames(n_frames).result()
     camera.remove_request_callback(_capture_timing_callback)
+    dropped = camera.frame_sequence.dropped - dropped_at_start
+    if dropped:
+        # Frames delivered late enough for others to be lost skew the offset
+        _log.warning(f"{dropped} frames were dropped while calibrating")
 
     # NB: This segment relies on python's integer size growth
     offset = sum(deltas) / len(deltas)
@@ -0,0 +1,52 @@
+"""Helpers shared between the tests, which shouldn't import from each other."""
+import numpy as np
+
+from scicamera.formats import csi2p_row_bytes, round_up_to_multiple
+
+
+def pack_csi2p(image: np.ndarray, bit_depth: int, stride: int) -> np.ndarray:
+    """Pack a (h, w) image into a flat CSI2P byte buffer with the given stride."""
+    height, width = image.shape
+    n_pixels = 4 if bit_depth == 10 else 2
+    padded = np.zeros((height, round_up_to_multiple(width, n_pixels)), np.uint16)
+    padded[:, :width] = image
+    p = padded.reshape((height, -1, n_pixels)).astype(np.uint64)
+    if bit_depth == 10:
+        bits = (p[..., 0] << 30) | (p[..., 1] << 20) | (p[..., 2] << 10) | p[..., 3]
+        groups = np.stack([(bits >> s) & 0xFF for s in (32, 24, 16, 8, 0)], -1)
+    else:
+        lsbs = (p[..., 0] & 0xF) | ((p[..., 1] & 0xF) << 4)
+        groups = np.stack([p[..., 0] >> 4, p[..., 1] >> 4, lsbs], -1)
+    groups = groups.reshape((height, -1)).astype(np.uint8)
+
+    row_bytes = min(groups.shape[1], stride)
+    assert row_bytes >= csi2p_row_bytes(width, bit_depth)
+    rows = np.zeros((height, stride), dtype=np.uint8)
+    rows[:, :row_bytes] = groups[:, :row_bytes]
+    return rows.ravel()
+
+
+def random_image(shape, bit_depth: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 2**bit_depth, size=shape, dtype=np.uint16)
+
+
+class Callbacks:
+    """The part of a camera which takes request callbacks, delivering fake requests
+    made by ``make_request`` from each value given to ``deliver``."""
+
+    def __init__(self, make_request):
+        self.make_request = make_request
+        self.callbacks = []
+
+    def add_request_callback(self, callback):
+        self.callbacks.append(callback)
+
+    def remove_request_callback(self, callback):
+        self.callbacks.remove(callback)
+
+    def deliver(self, *values):
+        for value in values:
+            request = self.make_request(value)
+            for callback in list(self.callbacks):
+                callback(request)
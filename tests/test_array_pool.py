@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+
+from scicamera.array_pool import ArrayPool, aligned_empty, array_spec
+from scicamera.configuration import StreamConfig
+
+
+class Config:
+    """The part of a CameraConfig the pool looks at."""
+
+    def __init__(self, **streams):
+        self.streams = streams
+
+    def get_stream_config(self, name):
+        return self.streams.get(name)
+
+
+@pytest.mark.parametrize(
+    "config, shape, dtype",
+    [
+        (StreamConfig((6, 4), "RGB888", 32), (4, 6, 3), np.uint8),
+        (StreamConfig((6, 4), "XBGR8888", 32), (4, 6, 4), np.uint8),
+        (StreamConfig((6, 4), "YUV420", 8), (6, 8), np.uint8),
+        (StreamConfig((6, 4), "YUYV", 16), (4, 8, 2), np.uint8),
+        (StreamConfig((6, 4), "SBGGR12_CSI2P", 32), (4, 6), np.uint16),
+        (StreamConfig((6, 4), "SBGGR8", 32), (4, 6), np.uint8),
+    ],
+)
+def test_array_spec(config, shape, dtype):
+    assert array_spec(config) == (shape, np.dtype(dtype))
+
+
+def test_array_spec_unknown():
+    assert array_spec(StreamConfig((6, 4), "MJPEG", 0)) is None
+
+
+@pytest.mark.parametrize("alignment", [16, 64, 4096])
+def test_aligned_empty(alignment):
+    for shape in [(3, 5, 3), (1,), (7, 9)]:
+        array = aligned_empty(shape, np.uint16, alignment)
+        assert array.shape == shape and array.dtype == np.uint16
+        assert array.ctypes.data % alignment == 0
+        assert array.flags.c_contiguous and array.flags.writeable
+
+
+def test_array_pool_reuse():
+    pool = ArrayPool(alignment=64)
+    pool.configure(Config(main=StreamConfig((6, 4), "RGB888", 18)))
+
+    first = pool.acquire("main")
+    second = pool.acquire("main")
+    assert first.shape == (4, 6, 3) and first is not second
+    assert first.ctypes.data % 64 == 0
+    assert pool.n_free("main") == 0
+
+    pool.release(first)
+    assert pool.n_free("main") == 1
+    with pool.lease(pool.acquire("main")) as third:
+        assert third is first
+    assert pool.n_free("main") == 1
+
+    # Releasing twice, or something the pool did not hand out, is rejected
+    with pytest.raises(ValueError):
+        pool.release(first)
+    with pytest.raises(ValueError):
+        pool.release(np.empty((4, 6, 3), dtype=np.uint8))
+    assert pool.n_free("main") == 1
+
+    with pytest.raises(ValueError):
+        pool.acquire("lores")
+
+
+def test_array_pool_reconfigure():
+    pool = ArrayPool()
+    pool.configure(Config(main=StreamConfig((6, 4), "RGB888", 18)))
+    old = pool.acquire("main")
+
+    pool.configure(Config(raw=StreamConfig((8, 2), "SRGGB10_CSI2P", 32)))
+    pool.release(old)
+    assert pool.n_free("main") == 0
+    assert pool.acquire("raw").shape == (2, 8)
+    with pytest.raises(ValueError):
+        pool.acquire("main")
+
+
+def test_array_pool_dropped_arrays():
+    pool = ArrayPool()
+    pool.configure(Config(main=StreamConfig((6, 4), "RGB888", 18)))
+    dropped = pool.acquire("main")
+    key = id(dropped)
+    del dropped
+
+    # An unrelated array can't be released into the pool, even with a reused id
+    for _ in range(100):
+        other = np.empty((4, 6, 3), dtype=np.uint8)
+        if id(other) == key:
+            break
+    with pytest.raises(ValueError):
+        pool.release(other)
+    assert pool.n_free("main") == 0
+
+    kept = pool.acquire("main")
+    assert list(pool._owners) == [id(kept)]
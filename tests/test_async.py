@@ -0,0 +1,59 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from scicamera.fake import FakeCamera
+from scicamera.frame import CameraFrame
+
+
+@pytest.fixture
+def camera():
+    with FakeCamera() as camera:
+        camera.start()
+        yield camera
+        camera.stop()
+
+
+def test_capture_async(camera: FakeCamera):
+    async def main():
+        array, metadata = await asyncio.gather(
+            camera.capture_array_async(), camera.capture_metadata_async()
+        )
+        image = await camera.capture_image_async()
+        frame = await camera.capture_frame_async()
+        return array, metadata, image, frame
+
+    array, metadata, image, frame = asyncio.run(main())
+    assert array.shape == (240, 320, 3)
+    assert "SensorTimestamp" in metadata
+    assert image.size == (320, 240)
+    assert isinstance(frame, CameraFrame)
+
+
+def test_frames_async(camera: FakeCamera):
+    async def main():
+        frames = []
+        it = camera.frames("main")
+        try:
+            async for frame in it:
+                frames.append(frame)
+                if len(frames) == 3:
+                    break
+        finally:
+            await it.aclose()
+        return frames
+
+    frames = asyncio.run(main())
+    assert len(frames) == 3
+    timestamps = [frame.metadata["SensorTimestamp"] for frame in frames]
+    assert np.all(np.diff(timestamps) > 0)
+    assert camera._request_callbacks == []
+
+
+def test_capture_async_error(camera: FakeCamera):
+    async def main():
+        await camera.capture_array_async("nonexistent")
+
+    with pytest.raises(KeyError):
+        asyncio.run(main())
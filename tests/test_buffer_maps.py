@@ -0,0 +1,72 @@
+import gc
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from scicamera.request import BufferMapCache
+
+
+def make_buffer(fd: int, lengths, bytes_used=None):
+    """Something shaped like a libcamera FrameBuffer, with planes in one fd."""
+    offsets = np.cumsum([0] + list(lengths))[:-1]
+    planes = [
+        SimpleNamespace(fd=fd, offset=int(offset), length=length)
+        for offset, length in zip(offsets, lengths)
+    ]
+    used = lengths if bytes_used is None else bytes_used
+    metadata = SimpleNamespace(planes=[SimpleNamespace(bytes_used=n) for n in used])
+    return SimpleNamespace(planes=planes, metadata=metadata)
+
+
+@pytest.fixture
+def fd():
+    fd = os.memfd_create("frame")
+    os.write(fd, bytes(range(256)) * 4)
+    yield fd
+    os.close(fd)
+
+
+def test_buffer_maps_reused(fd):
+    cache = BufferMapCache()
+    buffer = make_buffer(fd, [512, 256, 256])
+    cache.populate([buffer])
+    assert len(cache) == 1
+
+    first = cache.array(buffer)
+    second = cache.array(buffer)
+    assert len(cache) == 1
+    assert first.size == 1024
+    assert np.shares_memory(first, second)
+    np.testing.assert_array_equal(first[:256], np.arange(256))
+
+    # Writes to the buffer (by the camera) show through the existing mapping
+    os.pwrite(fd, b"\xff", 0)
+    assert second[0] == 255
+
+
+def test_buffer_maps_bytes_used(fd):
+    cache = BufferMapCache()
+    full = make_buffer(fd, [1024])
+    cache.populate([full])
+    jpeg = make_buffer(fd, [1024], bytes_used=[100])
+    assert cache.array(jpeg).size == 100
+    assert len(cache) == 1
+
+
+def test_buffer_maps_close_with_live_views(fd):
+    cache = BufferMapCache()
+    buffer = make_buffer(fd, [1024])
+    view = cache.array(buffer)[10:20]
+    cache.close()
+    assert len(cache) == 0
+    # The view keeps its mapping alive until it is freed
+    np.testing.assert_array_equal(view, np.arange(10, 20))
+    del view
+    gc.collect()
+
+    # A closed cache maps buffers afresh when asked
+    assert cache.array(buffer).size == 1024
+    assert len(cache) == 1
+    cache.close()
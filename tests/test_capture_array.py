@@ -33,3 +33,25 @@ def test_capture_array_mode_change(CameraClass: Type[Camera]):
         camera.discard_frames(2)
         array = camera.capture_array(config=still_config).result()
         assert array.shape == camera.sensor_resolution[::-1] + (3,)
+
+
+def test_capture_buffer_view_holds_request():
+    with Camera() as camera:
+        camera.configure(CameraConfig.for_preview(camera))
+        camera.start()
+        mature_after_frames_or_timeout(camera)
+
+        request = camera.capture_request().result()
+        copied = request.get_buffer("main")
+        with request.buffer_view("main") as view:
+            assert not view.flags.writeable
+            assert request.ref_count == 2
+            np.testing.assert_array_equal(view, copied)
+        assert request.ref_count == 1
+
+        view = request.get_buffer_view("main")
+        assert request.ref_count == 2
+        del view
+        assert request.ref_count == 1
+        request.release()
+        camera.stop()
@@ -0,0 +1,139 @@
+import numpy as np
+import pytest
+
+from scicamera.converters import (
+    YUV2RGB_JPEG,
+    YUV2RGB_REC709,
+    YUV2RGB_SMPTE170M,
+    YUV420_to_RGB,
+    YUV420_to_RGB_full,
+    YUV_to_RGB,
+    YVU420_to_RGB_full,
+    yuv_planes,
+)
+
+
+def make_yuv420(size, stride, seed=0):
+    """A random YUV420 buffer, with its planes at full resolution for reference."""
+    w, h = size
+    rng = np.random.default_rng(seed)
+    Y = rng.integers(0, 256, (h, stride), dtype=np.uint8)
+    U = rng.integers(0, 256, (h // 2, stride // 2), dtype=np.uint8)
+    V = rng.integers(0, 256, (h // 2, stride // 2), dtype=np.uint8)
+    buffer = np.concatenate([Y.ravel(), U.ravel(), V.ravel()])
+
+    def full(plane):
+        return plane[:, : w // 2].repeat(2, axis=0).repeat(2, axis=1)
+
+    return buffer, Y[:, :w], full(U), full(V)
+
+
+def reference(Y, U, V, matrix, rb_swap):
+    y_offset = 0 if matrix[0, 0] == 1.0 else 16
+    YUV = np.stack([Y - float(y_offset), U - 128.0, V - 128.0], axis=-1)
+    if rb_swap:
+        matrix = matrix[:, [2, 1, 0]]
+    return np.dot(YUV, matrix).clip(0, 255)
+
+
+@pytest.mark.parametrize("matrix", [YUV2RGB_JPEG, YUV2RGB_SMPTE170M, YUV2RGB_REC709])
+@pytest.mark.parametrize("rb_swap", [True, False])
+def test_yuv420_to_rgb_full(matrix, rb_swap):
+    size, stride = (38, 20), 64
+    buffer, Y, U, V = make_yuv420(size, stride)
+    rgb = YUV420_to_RGB_full(buffer, size, stride, matrix=matrix, rb_swap=rb_swap)
+    assert rgb.shape == (20, 38, 3) and rgb.dtype == np.uint8
+    expected = reference(Y, U, V, matrix, rb_swap)
+    assert np.abs(rgb - expected).max() <= 0.5 + 1e-3
+
+
+def test_yvu420_to_rgb_full():
+    size, stride = (16, 8), 16
+    buffer, Y, U, V = make_yuv420(size, stride)
+    rgb = YVU420_to_RGB_full(buffer, size, stride)
+    expected = reference(Y, V, U, YUV2RGB_JPEG, True)
+    assert np.abs(rgb - expected).max() <= 0.5 + 1e-3
+
+
+def test_yuv420_to_rgb_full_matches_half_resolution():
+    size = (32, 16)
+    buffer, *_ = make_yuv420(size, 32, seed=1)
+    half = YUV420_to_RGB(buffer, size).astype(int)
+    full = YUV420_to_RGB_full(buffer.reshape(24, 32), size).astype(int)
+    # The half resolution converter truncates where this one rounds
+    assert np.abs(full[::2, ::2] - half).max() <= 1
+
+
+@pytest.mark.parametrize("workers", [2, 3])
+def test_yuv420_to_rgb_full_out_and_workers(workers):
+    size, stride = (64, 90), 96
+    buffer, *_ = make_yuv420(size, stride, seed=2)
+    expected = YUV420_to_RGB_full(buffer, size, stride)
+    out = np.zeros((90, 64, 3), dtype=np.uint8)
+    result = YUV420_to_RGB_full(buffer, size, stride, out=out, workers=workers)
+    assert result is out
+    np.testing.assert_array_equal(out, expected)
+
+    with pytest.raises(ValueError):
+        YUV420_to_RGB_full(buffer, size, stride, out=out[:-2])
+
+
+def test_yuv420_to_rgb_full_bad_sizes():
+    with pytest.raises(ValueError):
+        YUV420_to_RGB_full(np.zeros(100, dtype=np.uint8), (5, 4))
+    with pytest.raises(ValueError):
+        YUV420_to_RGB_full(np.zeros(10, dtype=np.uint8), (4, 4))
+
+
+def pack_nv(Y, U, V, stride, swap=False):
+    """Semi-planar NV12 (or NV21 with swap) from full resolution planes."""
+    h, w = Y.shape
+    buffer = np.zeros((h * 3 // 2, stride), dtype=np.uint8)
+    buffer[:h, :w] = Y
+    first, second = (V, U) if swap else (U, V)
+    buffer[h:, 0:w:2] = first[::2, ::2]
+    buffer[h:, 1:w:2] = second[::2, ::2]
+    return buffer
+
+
+@pytest.mark.parametrize("fmt", ["NV12", "NV21"])
+def test_nv_planes_and_rgb(fmt):
+    size, stride = (12, 6), 16
+    _, Y, U, V = make_yuv420(size, 16, seed=3)
+    buffer = pack_nv(Y, U, V, stride, swap=fmt == "NV21")
+
+    planes = yuv_planes(buffer, size, stride, fmt)
+    for plane, expected in zip(planes, [Y, U[::2, ::2], V[::2, ::2]]):
+        np.testing.assert_array_equal(plane, expected)
+        assert np.shares_memory(plane, buffer)
+
+    rgb = YUV_to_RGB(buffer, size, fmt, stride, rb_swap=False)
+    assert np.abs(rgb - reference(Y, U, V, YUV2RGB_JPEG, False)).max() <= 0.5 + 1e-3
+
+
+@pytest.mark.parametrize("fmt", ["YUYV", "YVYU", "UYVY", "VYUY"])
+def test_packed_422_planes_and_rgb(fmt):
+    w, h, stride = 10, 5, 24
+    rng = np.random.default_rng(4)
+    Y = rng.integers(0, 256, (h, w), dtype=np.uint8)
+    U = rng.integers(0, 256, (h, w // 2), dtype=np.uint8)
+    V = rng.integers(0, 256, (h, w // 2), dtype=np.uint8)
+    buffer = np.zeros((h, stride), dtype=np.uint8)
+    groups = buffer[:, : 2 * w].reshape(h, w // 2, 4)
+    sources = {"Y": [Y[:, 0::2], Y[:, 1::2]], "U": [U], "V": [V]}
+    for i, letter in enumerate(fmt):
+        groups[..., i] = sources[letter].pop(0)
+
+    planes = yuv_planes(buffer, (w, h), stride, fmt)
+    for plane, expected in zip(planes, [Y, U, V]):
+        np.testing.assert_array_equal(plane, expected)
+        assert np.shares_memory(plane, buffer)
+
+    rgb = YUV_to_RGB(buffer, (w, h), fmt, stride, matrix=YUV2RGB_REC709)
+    full = [Y, U.repeat(2, axis=1), V.repeat(2, axis=1)]
+    assert np.abs(rgb - reference(*full, YUV2RGB_REC709, True)).max() <= 0.5 + 1e-3
+
+
+def test_yuv_planes_bad_format():
+    with pytest.raises(ValueError):
+        yuv_planes(np.zeros(100, dtype=np.uint8), (4, 4), None, "RGB888")
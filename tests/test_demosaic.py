@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from scicamera.demosaic import DEMOSAIC_METHODS, demosaic, demosaic_superpixel
+from scicamera.sensor_format import SensorFormat
+
+BAYER_ORDERS = ("RGGB", "BGGR", "GRBG", "GBRG")
+
+
+def mosaic_from_rgb(rgb: np.ndarray, bayer_order: str) -> np.ndarray:
+    mosaic = np.empty(rgb.shape[:2], dtype=rgb.dtype)
+    for position, colour in enumerate(bayer_order):
+        row, col = position // 2, position % 2
+        mosaic[row::2, col::2] = rgb[row::2, col::2, "RGB".index(colour)]
+    return mosaic
+
+
+@pytest.mark.parametrize("method", DEMOSAIC_METHODS)
+@pytest.mark.parametrize("bayer_order", BAYER_ORDERS)
+def test_demosaic_flat_colour(method: str, bayer_order: str):
+    rgb = np.empty((8, 12, 3), dtype=np.uint16)
+    rgb[...] = (100, 2000, 4095)
+    mosaic = mosaic_from_rgb(rgb, bayer_order)
+
+    result = demosaic(mosaic, bayer_order, method=method)
+    scale = 2 if method == "superpixel" else 1
+    np.testing.assert_array_equal(result, rgb[::scale, ::scale])
+
+
+@pytest.mark.parametrize("method", ("bilinear", "gradient"))
+@pytest.mark.parametrize("bayer_order", BAYER_ORDERS)
+def test_demosaic_linear_ramp_interior(method: str, bayer_order: str):
+    y, x = np.mgrid[0:16, 0:20]
+    rgb = np.stack([10 * x + 3 * y, 20 * x + 50, 5 * y + 7 * x + 100], -1)
+    rgb = rgb.astype(np.uint16)
+    mosaic = mosaic_from_rgb(rgb, bayer_order)
+
+    out = np.zeros_like(rgb)
+    result = demosaic(mosaic, bayer_order, method=method, out=out)
+    assert result is out
+    np.testing.assert_array_equal(result[2:-2, 2:-2], rgb[2:-2, 2:-2])
+
+
+def test_demosaic_superpixel_green_mean():
+    mosaic = np.array([[10, 65535], [65534, 20]], dtype=np.uint16)
+    rgb = demosaic_superpixel(mosaic, "RGGB")
+    np.testing.assert_array_equal(rgb, [[[10, 65534, 20]]])
+
+
+def test_demosaic_gradient_clips():
+    mosaic = np.zeros((8, 8), dtype=np.uint16)
+    mosaic[::2, ::2] = 4095
+    rgb = demosaic(mosaic, "RGGB", method="gradient", max_value=4095)
+    assert rgb.max() <= 4095
+    np.testing.assert_array_equal(
+        demosaic(mosaic, "SRGGB12_CSI2P", method="gradient"), rgb
+    )
+    np.testing.assert_array_equal(
+        demosaic(mosaic, SensorFormat("SRGGB12"), method="gradient"), rgb
+    )
+    # Green next to a lone bright red overshoots, bounded by the dtype without a format
+    mosaic = np.zeros((8, 8), dtype=np.uint16)
+    mosaic[0::2, 1::2] = mosaic[1::2, 0::2] = 4095
+    mosaic[4, 4] = 4095
+    assert demosaic(mosaic, "RGGB", method="gradient").max() > 4095
+    assert demosaic(mosaic, "SRGGB12", method="gradient").max() == 4095
+
+
+def test_demosaic_rejects_bad_input():
+    with pytest.raises(ValueError):
+        demosaic(np.zeros((4, 4), np.uint16), "RGGB", method="nearest")
+    with pytest.raises(ValueError):
+        demosaic(np.zeros((4, 5), np.uint16), "RGGB")
+    with pytest.raises(ValueError):
+        demosaic(np.zeros((4, 4), np.uint16), "RGBG")
+    with pytest.raises(ValueError):
+        demosaic(np.zeros((4, 4), np.uint16), "RGGB", out=np.zeros((4, 4, 3)))
@@ -1,10 +1,13 @@
+import threading
 import time
+from dataclasses import replace
 
 import numpy as np
 import pytest
 from PIL import Image
 
-from scicamera.fake import FakeCamera
+from scicamera.configuration import StreamConfig
+from scicamera.fake import FakeCamera, FakeCompletedRequest
 from scicamera.testing import mature_after_frames_or_timeout
 
 
@@ -70,6 +73,42 @@ def test_fake_metadata(camera: FakeCamera):
     assert isinstance(metadata, dict)
 
 
+def test_fake_dropped_frames(camera: FakeCamera):
+    assert camera.capture_metadata().result(timeout=0.2)["dropped_before"] == 0
+    frame_duration = camera.controls.FrameDurationLimits[0] / 1e6
+    held_up = []
+
+    def hold_up(request):
+        if not held_up:
+            held_up.append(request)
+            time.sleep(3.5 * frame_duration)
+
+    # Holding up the runloop makes the camera skip frames
+    camera.add_request_callback(hold_up)
+    mature_after_frames_or_timeout(camera, 3)
+    camera.remove_request_callback(hold_up)
+    assert camera.frame_sequence.dropped >= 2
+    assert camera.frame_sequence.gaps >= 1
+    assert camera.capture_metadata().result(timeout=0.2)["dropped_before"] == 0
+
+
+def test_fake_switch_mode_is_not_a_drop(camera: FakeCamera):
+    camera.capture_metadata().result(timeout=0.2)
+    frame_duration = camera.controls.FrameDurationLimits[0] / 1e6
+    configure = camera.configure
+
+    def slow_configure(config):
+        # Reconfiguring takes a few frames, during which the camera is stopped
+        time.sleep(3.5 * frame_duration)
+        configure(config)
+
+    camera.configure = slow_configure
+    dropped = camera.frame_sequence.dropped
+    camera.switch_mode(camera.config).result(timeout=1.0)
+    assert camera.capture_metadata().result(timeout=0.2)["dropped_before"] == 0
+    assert camera.frame_sequence.dropped == dropped
+
+
 def test_fake_array(camera: FakeCamera):
     array = camera.capture_array().result(timeout=0.2)
     assert isinstance(array, np.ndarray)
@@ -83,3 +122,108 @@ def test_fake_buffer(camera: FakeCamera):
 def test_fake_image(camera: FakeCamera):
     image = camera.capture_image().result(timeout=0.2)
     assert isinstance(image, Image.Image)
+
+
+def test_fake_buffer_view(camera: FakeCamera):
+    request = camera.capture_request().result(timeout=0.2)
+    try:
+        with request.buffer_view("main") as view:
+            np.testing.assert_array_equal(view, request.get_buffer("main"))
+        assert request.get_buffer_view("main").ndim == 1
+    finally:
+        request.release()
+
+
+def test_fake_pooled_array(camera: FakeCamera):
+    first = camera.capture_array(pooled=True).result(timeout=0.2)
+    np.testing.assert_array_equal(first, camera.capture_array().result(timeout=0.2))
+    camera.array_pool.release(first)
+
+    with camera.array_pool.lease(camera.capture_array(pooled=True).result()) as again:
+        assert again is first
+    assert camera.array_pool.n_free("main") == 1
+
+
+def test_fake_aligned_pooled_array():
+    with FakeCamera(array_alignment=64) as camera:
+        camera.start()
+        array = camera.capture_array(pooled=True).result(timeout=1)
+        assert array.ctypes.data % 64 == 0
+        camera.array_pool.release(array)
+        camera.stop()
+
+
+@pytest.mark.parametrize("fmt, stride", [("YUYV", 64), ("NV12", 32), ("YUV420", 32)])
+def test_fake_yuv_image(camera: FakeCamera, fmt, stride):
+    config = replace(camera.config, main=StreamConfig((32, 8), fmt, stride))
+    request = FakeCompletedRequest(config, {})
+    image = request.make_image("main")
+    assert image.mode == "RGB" and image.size == (32, 8)
+
+
+def test_fake_shared_products(camera: FakeCamera):
+    arrays = []
+
+    def callback(request):
+        arrays.append(request.get_shared("array", "main"))
+
+    camera.add_request_callback(callback)
+    try:
+        array = camera.capture_array(shared=True).result(timeout=0.2)
+    finally:
+        camera.remove_request_callback(callback)
+    assert not array.flags.writeable
+    assert any(a is array for a in arrays)
+
+    request = camera.capture_request().result(timeout=0.2)
+    assert request.get_shared("metadata") is request.get_shared("metadata")
+    assert request.get_shared("image", "main") is request.get_shared("image", "main")
+    with pytest.raises(ValueError):
+        request.get_shared("thumbnail", "main")
+    with pytest.raises(ValueError):
+        camera.capture_array(pooled=True, shared=True)
+    with pytest.raises(TypeError):
+        request.get_shared("metadata")["Lux"] = 0
+
+
+def test_fake_shared_products_made_independently(camera: FakeCamera):
+    class SlowRequest(FakeCompletedRequest):
+        def make_array(self, name, roi=None, out=None):
+            started.set()
+            release.wait(1)
+            return super().make_array(name, roi, out)
+
+    started, release = threading.Event(), threading.Event()
+    request = SlowRequest(camera.config, {})
+    thread = threading.Thread(target=request.get_shared, args=("array", "main"))
+    thread.start()
+    started.wait(1)
+    # The metadata doesn't wait for the array being made
+    assert "SensorTimestamp" in request.get_shared("metadata")
+    release.set()
+    thread.join()
+    assert request.get_shared("array", "main").shape == (240, 320, 3)
+
+
+def test_fake_burst(camera: FakeCamera):
+    burst = camera.capture_burst(4).result(timeout=1)
+    assert len(burst) == 4
+    assert burst.arrays.shape == (4, 240, 320, 3)
+    np.testing.assert_array_equal(burst.arrays[2], camera.capture_array().result())
+
+    timestamps = burst.metadata["SensorTimestamp"]
+    assert timestamps.dtype == np.int64 and np.all(np.diff(timestamps) > 0)
+    assert burst.metadata["Lux"].dtype == np.float64
+    assert "ColourTemperature" in burst.metadata
+    assert "AnalogueGain" in burst.metadata
+
+    with pytest.raises(ValueError):
+        camera.capture_burst(0)
+
+
+def test_fake_burst_offloaded(camera: FakeCamera):
+    camera.offload_tasks(2)
+    burst = camera.capture_burst(3, metadata_keys=["SensorTimestamp", "Missing"])
+    burst = burst.result(timeout=1)
+    assert list(burst.metadata) == ["SensorTimestamp"]
+    assert np.all(np.diff(burst.metadata["SensorTimestamp"]) > 0)
@@ -4,11 +4,19 @@ import numpy as np
 import pytest
 
 from scicamera.formats import (
+    BAYER_PLANES,
     SensorFormat,
+    bayer_plane_indices,
+    binned_shape,
+    csi2p_row_bytes,
+    iter_raw_rows,
+    raw_view,
     round_up_to_multiple,
     unpack_csi_padded,
     unpack_raw,
+    unpack_raw_planes,
 )
+from tests.helpers import pack_csi2p, random_image
 
 _10BIT = SensorFormat("SBGGR10_CSI2P")
 _12BIT = SensorFormat("SBGGR12_CSI2P")
@@ -166,3 +174,244 @@ def test_unpack_padded_imx219():
     unpacked = unpack_csi_padded(raw, nominal_size, fmt)
     assert unpacked.dtype == np.uint16
     assert unpacked.shape == nominal_size
+
+
+@pytest.mark.parametrize("fmt", (_10BIT, _12BIT))
+@pytest.mark.parametrize("width", (2, 6, 8, 38, 40))
+@pytest.mark.parametrize("extra_stride", (0, 7, 64))
+def test_unpack_roundtrip_stride(fmt: SensorFormat, width: int, extra_stride: int):
+    image = random_image((6, width), fmt.bit_depth)
+    stride = csi2p_row_bytes(width, fmt.bit_depth) + extra_stride
+    raw = pack_csi2p(image, fmt.bit_depth, stride)
+
+    unpacked = unpack_raw(raw, image.shape, fmt, stride=stride)
+    np.testing.assert_array_equal(unpacked, image)
+
+
+@pytest.mark.parametrize("fmt", (_10BIT, _12BIT))
+def test_unpack_into_out(fmt: SensorFormat):
+    image = random_image((4, 64), fmt.bit_depth)
+    stride = round_up_to_multiple(csi2p_row_bytes(64, fmt.bit_depth), 32)
+    raw = pack_csi2p(image, fmt.bit_depth, stride)
+
+    out = np.full(image.shape, 0xFFFF, dtype=np.uint16)
+    unpacked = unpack_raw(raw, image.shape, fmt, stride=stride, out=out)
+    assert unpacked is out
+    np.testing.assert_array_equal(out, image)
+
+
+def test_unpack_rejects_bad_out():
+    raw = np.zeros(64, dtype=np.uint8)
+    with pytest.raises(ValueError):
+        unpack_raw(raw, (2, 4), _10BIT, out=np.empty((2, 4), dtype=np.float32))
+    with pytest.raises(ValueError):
+        unpack_raw(raw, (2, 4), _10BIT, out=np.empty((4, 2), dtype=np.uint16))
+
+
+def test_unpack_rejects_short_buffer():
+    raw = np.zeros(40, dtype=np.uint8)
+    with pytest.raises(ValueError):
+        unpack_raw(raw, (2, 16), _10BIT, stride=32)
+    with pytest.raises(ValueError):
+        unpack_raw(raw, (1, 16), _10BIT, stride=10)
+
+
+@pytest.mark.parametrize(
+    "order,expected",
+    [
+        ("RGGB", ["R", "Gr", "Gb", "B"]),
+        ("BGGR", ["B", "Gb", "Gr", "R"]),
+        ("GRBG", ["Gr", "R", "B", "Gb"]),
+        ("GBRG", ["Gb", "B", "R", "Gr"]),
+    ],
+)
+def test_bayer_plane_indices(order: str, expected: List[str]):
+    assert [BAYER_PLANES[i] for i in bayer_plane_indices(order)] == expected
+
+
+@pytest.mark.parametrize("fmt_string", ("SBGGR10_CSI2P", "SGRBG12_CSI2P"))
+@pytest.mark.parametrize("width", (4, 6, 40, 42))
+def test_unpack_raw_planes(fmt_string: str, width: int):
+    fmt = SensorFormat(fmt_string)
+    image = random_image((8, width), fmt.bit_depth)
+    stride = round_up_to_multiple(csi2p_row_bytes(width, fmt.bit_depth), 32)
+    raw = pack_csi2p(image, fmt.bit_depth, stride)
+
+    out = np.empty((4, 4, width // 2), dtype=np.uint16)
+    planes = unpack_raw_planes(raw, image.shape, fmt, stride=stride, out=out)
+    assert planes is out
+
+    indices = bayer_plane_indices(fmt.bayer_order)
+    for position, (row, col) in enumerate(((0, 0), (0, 1), (1, 0), (1, 1))):
+        np.testing.assert_array_equal(planes[indices[position]], image[row::2, col::2])
+
+
+@pytest.mark.parametrize("order", ("RGBG", "GGRB", "RGGG"))
+def test_bayer_plane_indices_rejects(order: str):
+    with pytest.raises(ValueError):
+        bayer_plane_indices(order)
+
+
+def test_unpack_raw_planes_rejects_mono():
+    raw = np.zeros(64, dtype=np.uint8)
+    with pytest.raises(ValueError):
+        unpack_raw_planes(raw, (2, 4), SensorFormat("R10_CSI2P"))
+
+
+@pytest.mark.parametrize("workers", (2, 3, 4))
+def test_unpack_raw_workers(workers: int):
+    image = random_image((33, 40), 10)
+    stride = round_up_to_multiple(csi2p_row_bytes(40, 10), 32)
+    raw = pack_csi2p(image, 10, stride)
+
+    unpacked = unpack_raw(raw, image.shape, _10BIT, stride=stride, workers=workers)
+    np.testing.assert_array_equal(unpacked, image)
+
+    planes = unpack_raw_planes(raw[: 32 * stride], (32, 40), _10BIT, workers=workers)
+    np.testing.assert_array_equal(planes[0], image[1:32:2, 1::2])
+
+
+@pytest.mark.parametrize("fmt", ["SBGGR10_CSI2P", "SBGGR12_CSI2P", "SBGGR10"])
+def test_iter_raw_rows(fmt: str):
+    fmt = SensorFormat(fmt)
+    image = random_image((150, 40), fmt.bit_depth)
+    if fmt.packing:
+        stride = round_up_to_multiple(csi2p_row_bytes(40, fmt.bit_depth), 32)
+        raw = pack_csi2p(image, fmt.bit_depth, stride)
+    else:
+        raw = image.astype("<u2").view(np.uint8).ravel()
+    bands = [
+        band.copy() for band in iter_raw_rows(raw, image.shape, fmt, start=1, step=2)
+    ]
+    np.testing.assert_array_equal(np.concatenate(bands), image[1::2])
+
+
+@pytest.mark.parametrize(
+    "fmt_string,dtype",
+    [
+        ("SBGGR8", np.uint8),
+        ("R8", np.uint8),
+        ("R8_CSI2P", np.uint8),
+        ("SRGGB10", np.uint16),
+        ("SGBRG12", np.uint16),
+        ("R12", np.uint16),
+    ],
+)
+def test_unpack_raw_unpacked_is_view(fmt_string: str, dtype):
+    fmt = SensorFormat(fmt_string)
+    image = random_image((6, 10), fmt.bit_depth).astype(dtype)
+    stride = 16 * image.itemsize
+    rows = np.zeros((6, stride // image.itemsize), dtype=dtype)
+    rows[:, :10] = image
+    raw = rows.view(np.uint8).ravel()
+
+    unpacked = unpack_raw(raw, image.shape, fmt, stride=stride)
+    assert unpacked.dtype == dtype
+    assert np.shares_memory(unpacked, raw)
+    np.testing.assert_array_equal(unpacked, image)
+
+    out = np.empty(image.shape, dtype=dtype)
+    assert unpack_raw(raw, image.shape, fmt, stride=stride, out=out) is out
+    np.testing.assert_array_equal(out, image)
+
+
+def test_raw_view_rejects_packed_and_odd_stride():
+    raw = np.zeros(64, dtype=np.uint8)
+    with pytest.raises(ValueError):
+        raw_view(raw, (2, 4), _10BIT)
+    with pytest.raises(ValueError):
+        raw_view(raw, (2, 4), SensorFormat("SBGGR10"), stride=9)
+
+
+def test_unpack_raw_planes_unpacked():
+    fmt = SensorFormat("SGRBG10")
+    image = random_image((4, 8), fmt.bit_depth)
+    raw = image.view(np.uint8).ravel()
+
+    planes = unpack_raw_planes(raw, image.shape, fmt)
+    np.testing.assert_array_equal(planes[BAYER_PLANES.index("R")], image[::2, 1::2])
+    np.testing.assert_array_equal(planes[BAYER_PLANES.index("Gb")], image[1::2, 1::2])
+
+
+def _reference_bin(image: np.ndarray, factor: int, tile: int) -> np.ndarray:
+    h, w = image.shape
+    block = factor * tile
+    image = image[: h // block * block, : w // block * block].astype(np.uint32)
+    blocks = image.reshape((h // block, factor, tile, w // block, factor, tile))
+    return blocks.sum(axis=(1, 4)).reshape((h // block * tile, w // block * tile))
+
+
+@pytest.mark.parametrize(
+    "fmt_string,factor,dtype",
+    [
+        ("SBGGR10_CSI2P", 2, np.uint16),
+        ("SBGGR12_CSI2P", 4, np.uint16),
+        ("SBGGR12_CSI2P", 8, np.uint32),
+        ("R10_CSI2P", 2, np.uint16),
+        ("R12_CSI2P", 3, np.uint16),
+        ("SRGGB12", 2, np.uint16),
+        ("R8", 4, np.uint16),
+    ],
+)
+@pytest.mark.parametrize("workers", (1, 3))
+def test_unpack_raw_binned(fmt_string: str, factor: int, dtype, workers: int):
+    fmt = SensorFormat(fmt_string)
+    image = random_image((150, 68), fmt.bit_depth)
+    if fmt.packing == "CSI2P" and fmt.bit_depth != 8:
+        stride = round_up_to_multiple(csi2p_row_bytes(68, fmt.bit_depth), 32)
+        raw = pack_csi2p(image, fmt.bit_depth, stride)
+    else:
+        image = image.astype(np.uint8 if fmt.bit_depth == 8 else np.uint16)
+        raw = image.view(np.uint8).ravel()
+        stride = None
+
+    binned = unpack_raw(
+        raw, image.shape, fmt, stride=stride, binning=factor, workers=workers
+    )
+    tile = 1 if fmt.mono else 2
+    assert binned.shape == binned_shape(image.shape, fmt, factor)
+    assert binned.dtype == dtype
+    np.testing.assert_array_equal(binned, _reference_bin(image, factor, tile))
+
+
+def test_unpack_raw_binned_out():
+    image = random_image((8, 8), 10)
+    raw = pack_csi2p(image, 10, 32)
+    out = np.zeros((4, 4), dtype=np.uint32)
+    assert unpack_raw(raw, image.shape, _10BIT, binning=2, out=out) is out
+    np.testing.assert_array_equal(out, _reference_bin(image, 2, 2))
+
+    with pytest.raises(ValueError):
+        unpack_raw(raw, image.shape, _10BIT, binning=8)
+
+
+@pytest.mark.parametrize("fmt", (_10BIT, _12BIT))
+@pytest.mark.parametrize(
+    "roi", [(0, 0, 8, 4), (4, 3, 12, 5), (1, 1, 7, 9), (33, 0, 7, 10), (0, 0, 40, 10)]
+)
+@pytest.mark.parametrize("workers", (1, 2))
+def test_unpack_raw_roi(fmt: SensorFormat, roi, workers: int):
+    image = random_image((10, 40), fmt.bit_depth)
+    stride = csi2p_row_bytes(40, fmt.bit_depth)
+    raw = pack_csi2p(image, fmt.bit_depth, stride)
+
+    x, y, w, h = roi
+    unpacked = unpack_raw(
+        raw, image.shape, fmt, stride=stride, roi=roi, workers=workers
+    )
+    np.testing.assert_array_equal(unpacked, image[y : y + h, x : x + w])
+
+
+def test_unpack_raw_roi_unpacked_view():
+    image = random_image((6, 8), 12)
+    raw = image.view(np.uint8).ravel()
+    unpacked = unpack_raw(raw, image.shape, SensorFormat("R12"), roi=(2, 1, 4, 3))
+    assert np.shares_memory(unpacked, raw)
+    np.testing.assert_array_equal(unpacked, image[1:4, 2:6])
+
+
+@pytest.mark.parametrize("roi", [(0, 0, 0, 4), (-1, 0, 4, 4), (6, 0, 4, 2)])
+def test_unpack_raw_roi_rejects(roi):
+    raw = np.zeros(64, dtype=np.uint8)
+    with pytest.raises(ValueError):
+        unpack_raw(raw, (2, 8), _10BIT, roi=roi)
@@ -0,0 +1,111 @@
+from types import SimpleNamespace
+
+import libcamera
+
+from scicamera.lc_helpers import LazyMetadata, lc_unpack
+from scicamera.request import AbstractCompletedRequest, CompletedRequest
+
+
+class CountingValue(tuple):
+    """A control value which counts the conversions made of it."""
+
+    reads = 0
+
+    def __iter__(self):
+        self.reads += 1
+        return super().__iter__()
+
+
+class ControlId:
+    def __init__(self, name, type_=None):
+        self.name = name
+        self.type = type_
+
+
+def make_control_list():
+    gains = CountingValue((1.5, 2.0))
+    controls = {
+        ControlId("SensorTimestamp"): 123456789,
+        ControlId("ColourGains"): gains,
+        ControlId("ScalerCrop", libcamera.ControlType.Rectangle): libcamera.Rectangle(
+            0, 8, 640, 480
+        ),
+        ControlId("Sizes", libcamera.ControlType.Size): [
+            libcamera.Size(4, 2),
+            libcamera.Size(8, 6),
+        ],
+    }
+    return controls, gains
+
+
+def test_lc_unpack_converts():
+    controls, _ = make_control_list()
+    assert lc_unpack(controls) == {
+        "SensorTimestamp": 123456789,
+        "ColourGains": [1.5, 2.0],
+        "ScalerCrop": (0, 8, 640, 480),
+        "Sizes": [(4, 2), (8, 6)],
+    }
+
+
+def test_lazy_metadata_converts_on_access_once():
+    controls, gains = make_control_list()
+    metadata = LazyMetadata(controls)
+    assert metadata["SensorTimestamp"] == 123456789
+    assert gains.reads == 0
+
+    assert metadata["ColourGains"] == [1.5, 2.0]
+    assert metadata["ColourGains"] is metadata["ColourGains"]
+    assert gains.reads == 1
+
+    assert len(metadata) == 4
+    assert "ScalerCrop" in metadata and "Lux" not in metadata
+    assert metadata.get("Lux") is None
+    assert dict(metadata) == lc_unpack(make_control_list()[0])
+    assert gains.reads == 1
+
+
+def test_shared_metadata_dropped_on_release():
+    controls, _ = make_control_list()
+    lc_request = SimpleNamespace(metadata=controls)
+    cleanups = []
+    request = CompletedRequest(lc_request, None, {}, lambda: cleanups.append(1))
+
+    assert request.metadata["SensorTimestamp"] == 123456789
+    shared = request.get_shared("metadata")
+    assert shared is request.get_shared("metadata")
+    assert shared == request.get_metadata() and shared is not request.get_metadata()
+
+    request.release()
+    assert cleanups == [1]
+    assert request._shared == {}
+
+
+def test_added_metadata():
+    controls, _ = make_control_list()
+    buffer = SimpleNamespace(metadata=SimpleNamespace(sequence=17))
+    lc_request = SimpleNamespace(metadata=controls, buffers={"stream": buffer})
+    request = CompletedRequest(lc_request, None, {}, lambda: None)
+    assert request.sequence == 17
+
+    metadata = request.metadata
+    request._add_metadata("dropped_before", 2)
+    assert metadata["dropped_before"] == 2
+    assert len(metadata) == 5 and list(metadata)[-1] == "dropped_before"
+    assert request.get_metadata()["dropped_before"] == 2
+
+
+def test_added_metadata_default():
+    class Request(AbstractCompletedRequest):
+        def get_camera_config(self):
+            return None
+
+        def get_buffer(self, name):
+            return None
+
+        def get_metadata(self):
+            return {"SensorTimestamp": 1}
+
+    request = Request()
+    request._add_metadata("dropped_before", 0)
+    assert dict(request.metadata) == {"SensorTimestamp": 1, "dropped_before": 0}
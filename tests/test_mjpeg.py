@@ -0,0 +1,67 @@
+import io
+import threading
+import time
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from scicamera import mjpeg
+from scicamera.mjpeg import MjpegDecoder, decode_mjpeg
+
+
+def make_jpeg(size=(64, 48), shade=0) -> bytes:
+    w, h = size
+    array = np.full((h, w, 3), shade, dtype=np.uint8)
+    array[:, : w // 2, 0] = 255
+    output = io.BytesIO()
+    Image.fromarray(array).save(output, format="JPEG", quality=95)
+    return output.getvalue()
+
+
+@pytest.mark.parametrize("scale, shape", [(1, (48, 64)), (2, (24, 32)), (8, (6, 8))])
+def test_decode_mjpeg_scale(scale, shape):
+    array = decode_mjpeg(np.frombuffer(make_jpeg(), dtype=np.uint8), scale=scale)
+    assert array.shape == shape + (3,)
+    assert array[:, 0, 0].min() > 200 and array[:, -1, 0].max() < 50
+
+
+def test_decode_mjpeg_bad_scale():
+    with pytest.raises(ValueError):
+        decode_mjpeg(make_jpeg(), scale=3)
+    with pytest.raises(ValueError):
+        MjpegDecoder(scale=16)
+
+
+def test_mjpeg_decoder_preserves_order(monkeypatch):
+    # Make earlier frames slower to decode, so they finish out of order
+    decode = mjpeg.decode_mjpeg
+
+    def slow_decode(data, scale):
+        time.sleep(0.002 * data[-1])
+        return decode(data[:-1], scale)
+
+    monkeypatch.setattr(mjpeg, "decode_mjpeg", slow_decode)
+
+    delivered = []
+    threads = set()
+
+    def callback(array):
+        threads.add(threading.current_thread().name)
+        delivered.append(int(array[0, -1, 1]))
+
+    shades = [0, 40, 80, 120, 160, 200]
+    with MjpegDecoder(workers=3, scale=2, callback=callback) as decoder:
+        futures = [
+            decoder.submit(make_jpeg(shade=shade) + bytes([len(shades) - i]))
+            for i, shade in enumerate(shades)
+        ]
+    assert [f.result().shape for f in futures] == [(24, 32, 3)] * len(shades)
+    assert np.all(np.abs(np.array(delivered) - shades) < 8)
+    assert threads and all(t.startswith("scicamera-mjpeg") for t in threads)
+
+
+def test_mjpeg_decoder_without_callback():
+    with MjpegDecoder(workers=2) as decoder:
+        future = decoder.submit(make_jpeg())
+    assert future.result().shape == (48, 64, 3)
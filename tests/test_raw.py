@@ -35,3 +35,24 @@ def test_capture_raw():
 
         print(camera.info.model)
         assert raw.shape == (height, width)
+
+
+def test_capture_raw_roi():
+    with Camera() as camera:
+        _skip_if_no_raw(camera)
+
+        still_config = CameraConfig.for_still(camera)
+        still_config.enable_raw()
+        camera.configure(still_config)
+
+        camera.start()
+        camera.discard_frames(2).result()
+        request = camera.capture_request().result()
+        try:
+            full = request.make_array("raw")
+            window = request.make_array("raw", roi=(34, 16, 256, 128))
+        finally:
+            request.release()
+
+        assert window.shape == (128, 256)
+        assert (window == full[16:144, 34:290]).all()
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from scicamera.configuration import StreamConfig
+from scicamera.formats import csi2p_stride
+from scicamera.raw_archive import RawReader, RawRecorder
+from tests.helpers import pack_csi2p, random_image
+
+
+def test_raw_archive_roundtrip(tmp_path):
+    size = (40, 6)
+    stride = csi2p_stride(size[0], 12)
+    config = StreamConfig(size=size, format="SBGGR12_CSI2P", stride=stride)
+    images = [random_image(size[::-1], 12, seed=seed) for seed in range(3)]
+
+    path = str(tmp_path / "frames.raw")
+    with RawRecorder(path, config) as recorder:
+        for i, image in enumerate(images):
+            buffer = pack_csi2p(image, 12, stride)
+            recorder.write(buffer, {"SensorTimestamp": i, "ScalerCrop": (0, 0, 4, 4)})
+    assert recorder.n_frames == 3
+
+    with RawReader(path) as reader:
+        assert len(reader) == 3
+        assert reader.stream_config == config
+        assert reader.packed(0).size == stride * size[1]
+        for i, image in enumerate(images):
+            np.testing.assert_array_equal(reader[i], image)
+            assert reader.metadata(i) == {
+                "SensorTimestamp": i,
+                "ScalerCrop": [0, 0, 4, 4],
+            }
+        assert len(list(reader)) == 3
+
+
+def test_raw_archive_truncated(tmp_path):
+    config = StreamConfig(size=(4, 2), format="R8", stride=4)
+    path = str(tmp_path / "frames.raw")
+    with RawRecorder(path, config) as recorder:
+        recorder.write(np.arange(8, dtype=np.uint8), {})
+        recorder.write(np.arange(8, dtype=np.uint8), {})
+
+    with open(path, "r+b") as f:
+        f.truncate(f.seek(0, 2) - 1)
+
+    with RawReader(path) as reader:
+        assert len(reader) == 1
+        np.testing.assert_array_equal(reader[0], np.arange(8).reshape((2, 4)))
+
+
+def test_raw_recorder_rejects_processed_streams(tmp_path):
+    with pytest.raises(ValueError):
+        RawRecorder(str(tmp_path / "x.raw"), StreamConfig((4, 2), "RGB888", 12))
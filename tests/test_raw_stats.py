@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from scicamera.formats import BAYER_PLANES, SensorFormat, csi2p_stride
+from scicamera.raw_stats import raw_stats
+from tests.helpers import pack_csi2p, random_image
+
+
+def _expected_channels(image: np.ndarray):
+    # For a BGGR image
+    return {
+        "B": image[0::2, 0::2],
+        "Gb": image[0::2, 1::2],
+        "Gr": image[1::2, 0::2],
+        "R": image[1::2, 1::2],
+    }
+
+
+@pytest.mark.parametrize("fmt_string", ("SBGGR10_CSI2P", "SBGGR12_CSI2P"))
+def test_raw_stats_packed(fmt_string: str):
+    fmt = SensorFormat(fmt_string)
+    image = random_image((140, 44), fmt.bit_depth)
+    image[0, 0] = 2**fmt.bit_depth - 1
+    stride = csi2p_stride(44, fmt.bit_depth)
+    raw = pack_csi2p(image, fmt.bit_depth, stride)
+
+    stats = raw_stats(raw, image.shape, fmt, stride=stride, bins=16)
+    assert stats.channels == BAYER_PLANES
+    assert stats.n_pixels == image.size // 4
+    assert stats.histograms.shape == (4, 16)
+
+    shift = fmt.bit_depth - 4
+    for index, name in enumerate(BAYER_PLANES):
+        channel = _expected_channels(image)[name]
+        np.testing.assert_allclose(stats.means[index], channel.mean())
+        expected_hist = np.bincount(channel.ravel() >> shift, minlength=16)
+        np.testing.assert_array_equal(stats.histograms[index], expected_hist)
+        clipped = np.mean(channel == 2**fmt.bit_depth - 1)
+        assert stats.clipped_fraction[index] == clipped
+
+
+def test_raw_stats_row_step():
+    fmt = SensorFormat("SBGGR12_CSI2P")
+    image = random_image((16, 8), 12)
+    raw = pack_csi2p(image, 12, csi2p_stride(8, 12))
+
+    stats = raw_stats(raw, image.shape, fmt, row_step=4)
+    assert stats.n_pixels == 2 * 4
+    sampled = image.reshape((8, 2, 8))[::4].reshape((-1, 8))
+    np.testing.assert_allclose(
+        stats.means[BAYER_PLANES.index("R")], sampled[1::2, 1::2].mean()
+    )
+
+
+def test_raw_stats_unpacked_mono_does_not_modify_buffer():
+    fmt = SensorFormat("R10")
+    image = np.array([[0, 1023, 4000, 5]], dtype=np.uint16)
+    raw = image.view(np.uint8).ravel()
+
+    stats = raw_stats(raw, image.shape, fmt, bins=1024)
+    assert stats.channels == ("Y",)
+    assert stats.histograms[0, 1023] == 2
+    assert stats.clipped_fraction[0] == 0.5
+    assert image[0, 2] == 4000
+
+
+def test_raw_stats_rejects_bad_bins():
+    raw = np.zeros(64, dtype=np.uint8)
+    with pytest.raises(ValueError):
+        raw_stats(raw, (2, 4), SensorFormat("SBGGR10_CSI2P"), bins=100)
@@ -0,0 +1,110 @@
+import io
+import threading
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from scicamera.configuration import StreamConfig
+from scicamera.fake import FakeCamera, FakeCompletedRequest
+from scicamera.frame import CameraBurst
+from scicamera.ring import RingRecorder
+from tests.helpers import Callbacks
+
+CONFIG = replace(FakeCamera().config, main=StreamConfig((4, 2), "RGB888", 12))
+
+
+def make_request(timestamp):
+    request = FakeCompletedRequest(CONFIG, {"ExposureTime": 100})
+    request._metadata["SensorTimestamp"] = timestamp
+    return request
+
+
+def timestamps(burst):
+    return burst.metadata["SensorTimestamp"].tolist()
+
+
+def test_ring_recorder_trigger(tmp_path):
+    camera = Callbacks(make_request)
+    recorder = RingRecorder(camera, n_before=3, n_after=2)
+    camera.deliver(*range(10, 70, 10))
+    assert len(recorder) == 5
+    assert timestamps(recorder.snapshot()) == [20, 30, 40, 50, 60]
+
+    future = recorder.trigger(tmp_path / "event.npz")
+    assert recorder.trigger() is future
+    camera.deliver(70)
+    assert not future.done()
+    camera.deliver(80)
+    burst = future.result(timeout=1)
+    assert timestamps(burst) == [40, 50, 60, 70, 80]
+    assert burst.arrays.shape == (5, 2, 4, 3)
+    assert burst.metadata["ExposureTime"].tolist() == [100] * 5
+
+    saved = CameraBurst.load(tmp_path / "event.npz")
+    np.testing.assert_array_equal(saved.arrays, burst.arrays)
+    assert timestamps(saved) == timestamps(burst)
+
+    # Recording carries on afterwards, and stops once closed
+    camera.deliver(90)
+    assert timestamps(recorder.snapshot())[-1] == 90
+    recorder.close()
+    assert camera.callbacks == []
+
+
+class SlowFile(io.BytesIO):
+    """A file whose first write waits to be let through."""
+
+    def __init__(self):
+        super().__init__()
+        self.writing = threading.Event()
+        self.proceed = threading.Event()
+
+    def write(self, data):
+        self.writing.set()
+        self.proceed.wait(1)
+        return super().write(data)
+
+
+def test_ring_recorder_records_while_saving():
+    camera = Callbacks(make_request)
+    recorder = RingRecorder(camera, n_before=3)
+    camera.deliver(10, 20, 30)
+    file = SlowFile()
+    future = recorder.trigger(file)
+    assert file.writing.wait(1)
+
+    # Frames delivered during the save are recorded
+    camera.deliver(40, 50)
+    assert timestamps(recorder.snapshot()) == [30, 40, 50]
+    assert not future.done()
+    file.proceed.set()
+    assert timestamps(future.result(timeout=1)) == [10, 20, 30]
+    file.seek(0)
+    assert timestamps(CameraBurst.load(file)) == [10, 20, 30]
+
+
+def test_ring_recorder_before_only():
+    camera = Callbacks(make_request)
+    recorder = RingRecorder(camera, n_before=4, metadata_keys=[])
+    with pytest.raises(RuntimeError):
+        recorder.trigger().result(timeout=1)
+    camera.deliver(1, 2)
+    burst = recorder.trigger().result(timeout=1)
+    assert timestamps(burst) == [1, 2]
+    assert list(burst.metadata) == ["SensorTimestamp"]
+
+
+def test_burst_between():
+    camera = Callbacks(make_request)
+    recorder = RingRecorder(camera, n_before=6)
+    camera.deliver(100, 200, 300, 400, 500)
+    burst = recorder.snapshot()
+    assert timestamps(burst.between(200, 400)) == [200, 300]
+    assert timestamps(burst.between(250, 1000)) == [300, 400, 500]
+    assert len(burst.between(600, 700)) == 0
+
+
+def test_ring_recorder_bad_sizes():
+    with pytest.raises(ValueError):
+        RingRecorder(Callbacks(make_request), n_before=0, n_after=0)
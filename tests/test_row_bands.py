@@ -0,0 +1,27 @@
+import threading
+
+import pytest
+
+from scicamera import row_bands
+from scicamera.row_bands import decode_pool, run_in_row_bands
+
+
+def test_decode_pool_is_shared_and_capped():
+    pool = decode_pool(1)
+    assert decode_pool(1) is pool
+    big = decode_pool(10_000)
+    assert big._max_workers <= row_bands.DECODE_POOL_MAX
+    assert decode_pool(1) is big and decode_pool(10_000) is big
+
+
+@pytest.mark.parametrize("workers", [1, 3, 100])
+def test_run_in_row_bands_covers_every_row(workers: int):
+    covered = []
+    lock = threading.Lock()
+
+    def decode(rows: slice) -> None:
+        with lock:
+            covered.extend(range(rows.start, rows.stop))
+
+    run_in_row_bands(decode, 10, workers)
+    assert sorted(covered) == list(range(10))
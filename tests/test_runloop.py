@@ -0,0 +1,245 @@
+import time
+
+import pytest
+
+from scicamera.actions import RequestMachinery
+from scicamera.fake import FakeCamera
+from scicamera.request import LoopTask
+
+
+class Loop(RequestMachinery):
+    """Just the runloop, fed requests by hand."""
+
+    def close(self):
+        self.stop_runloop()
+
+
+class Request:
+    released = False
+    metadata = {}
+    sequence = None
+
+    def _add_metadata(self, name, value):
+        pass
+
+    def release(self):
+        self.released = True
+
+
+def test_runloop_runs_tasks_without_requests_immediately():
+    with Loop() as loop:
+        loop.start_runloop()
+        start = time.perf_counter()
+        future = loop._dispatch_loop_tasks(LoopTask.without_request(lambda: 42))[0]
+        assert future.result(timeout=1) == 42
+        assert time.perf_counter() - start < 0.04
+
+        # A task needing a request waits for one, and holds up the tasks after it
+        first, second = loop._dispatch_loop_tasks(
+            LoopTask.with_request(lambda request: request),
+            LoopTask.without_request(lambda: "after"),
+        )
+        time.sleep(0.01)
+        assert not first.done() and not second.done()
+
+        request = Request()
+        loop.add_completed_request(request)
+        assert first.result(timeout=1) is request
+        assert second.result(timeout=1) == "after"
+        assert request.released
+
+        start = time.perf_counter()
+    assert not loop.is_runloop_running()
+    assert time.perf_counter() - start < 0.04
+
+
+def test_fake_camera_tasks_do_not_wait_for_frames():
+    with FakeCamera() as camera:
+        camera.start()
+        camera.capture_metadata().result(timeout=1)
+        start = time.perf_counter()
+        task = LoopTask.without_request(lambda: None)
+        camera._dispatch_loop_tasks(task)[0].result(timeout=1)
+        assert (
+            time.perf_counter() - start < camera.controls.FrameDurationLimits[0] / 2e6
+        )
+        camera.stop()
+
+
+class CountedRequest(Request):
+    held = 1
+
+    def acquire(self):
+        self.held += 1
+
+    def release(self):
+        self.held -= 1
+
+
+def test_offloaded_tasks_mature_in_frame_order():
+    matured = []
+
+    def slow(delay, request):
+        time.sleep(delay)
+        return request
+
+    with Loop() as loop:
+        loop.offload_tasks(3)
+        loop.start_runloop()
+        delays = [0.03, 0.02, 0.01, 0.0]
+        futures = loop._dispatch_loop_tasks(
+            *[LoopTask.with_request(slow, delay) for delay in delays]
+        )
+        for i, future in enumerate(futures):
+            future.add_done_callback(lambda _, i=i: matured.append(i))
+
+        requests = [CountedRequest() for _ in delays]
+        start = time.perf_counter()
+        for request in requests:
+            loop.add_completed_request(request)
+        results = [future.result(timeout=1) for future in futures]
+        # The tasks ran in parallel, not one after the other on the runloop
+        assert time.perf_counter() - start < sum(delays)
+        loop.offload_tasks(0)
+
+    assert results == requests
+    assert matured == [0, 1, 2, 3]
+    assert [request.held for request in requests] == [0] * len(requests)
+
+
+def test_offloaded_task_errors():
+    def fail(request):
+        raise ValueError("conversion failed")
+
+    with Loop() as loop:
+        loop.offload_tasks(2)
+        loop.start_runloop()
+        future = loop._dispatch_loop_tasks(LoopTask.with_request(fail))[0]
+        request = CountedRequest()
+        loop.add_completed_request(request)
+        assert isinstance(future.exception(timeout=1), ValueError)
+        loop.offload_tasks(0)
+    assert request.held == 0
+
+
+def test_tasks_without_requests_wait_for_offloaded_tasks():
+    matured = []
+
+    def slow(request):
+        time.sleep(0.05)
+        return "converted"
+
+    with Loop() as loop:
+        loop.offload_tasks(2)
+        loop.start_runloop()
+        futures = loop._dispatch_loop_tasks(
+            LoopTask.with_request(slow),
+            LoopTask.without_request(lambda: "reconfigured"),
+        )
+        for i, future in enumerate(futures):
+            future.add_done_callback(lambda _, i=i: matured.append(i))
+        loop.add_completed_request(CountedRequest())
+        assert futures[1].result(timeout=1) == "reconfigured"
+        loop.offload_tasks(0)
+    assert matured == [0, 1]
+
+
+def test_removing_the_pool_while_tasks_are_handed_out():
+    def slow(request):
+        time.sleep(0.002)
+        return request
+
+    with Loop() as loop:
+        loop.offload_tasks(2)
+        loop.start_runloop()
+        futures = loop._dispatch_loop_tasks(
+            *[LoopTask.with_request(slow) for _ in range(40)]
+        )
+        requests = [CountedRequest() for _ in futures]
+        for i, request in enumerate(requests):
+            loop.add_completed_request(request)
+            if i == 20:
+                loop.offload_tasks(0)
+        assert [future.result(timeout=1) for future in futures] == requests
+    assert [request.held for request in requests] == [0] * len(requests)
+
+
+class Frame(CountedRequest):
+    def __init__(self, frame_duration=10000):
+        self.metadata = {"FrameDuration": frame_duration}
+
+
+def test_slow_worker_callback_skips_frames_without_holding_up_others():
+    fast, slow = [], []
+
+    def fast_callback(request):
+        fast.append(request)
+
+    def slow_callback(request):
+        time.sleep(0.05)
+        slow.append(request)
+
+    with Loop() as loop:
+        loop.add_request_callback(fast_callback)
+        loop.add_request_callback(slow_callback, worker=True, skip_if_busy=True)
+        loop.start_runloop()
+        frames = [Frame() for _ in range(5)]
+        for frame in frames:
+            loop.add_completed_request(frame)
+            time.sleep(0.01)
+        fast_done = len(fast)
+        loop._finish_request_callbacks()
+
+        fast_stats = loop.request_callback_stats(fast_callback)
+        slow_stats = loop.request_callback_stats(slow_callback)
+
+    assert fast_done == 5 and fast == frames
+    assert slow[0] is frames[0] and 1 <= len(slow) < 5
+    assert slow_stats.calls == len(slow)
+    assert slow_stats.skipped == slow_stats.busy == 5 - len(slow)
+    # 50ms runs overrun the 10ms frames, unlike the fast callback
+    assert slow_stats.overruns == len(slow) and slow_stats.max_time >= 0.05
+    assert fast_stats.calls == 5 and fast_stats.overruns == 0
+    assert [frame.held for frame in frames] == [0] * 5
+
+
+def test_worker_callback_queues_frames_when_busy():
+    seen = []
+
+    def callback(request):
+        time.sleep(0.01)
+        seen.append(request)
+
+    with Loop() as loop:
+        loop.add_request_callback(callback, worker=True, max_concurrency=2)
+        loop.start_runloop()
+        # Each run takes longer than a frame, but two at once keep up
+        frames = [Frame(frame_duration=8000) for _ in range(6)]
+        for frame in frames:
+            loop.add_completed_request(frame)
+        # Wait for the runloop to hand every frame over before stopping the workers
+        while any(frame.held == 1 for frame in frames):
+            time.sleep(0.001)
+        loop._finish_request_callbacks()
+        stats = loop.request_callback_stats(callback)
+
+    assert sorted(map(id, seen)) == sorted(map(id, frames))
+    assert stats.calls == 6 and stats.skipped == 0 and stats.busy > 0
+    assert stats.overruns == 0
+    assert [frame.held for frame in frames] == [0] * 6
+
+
+def test_request_callback_options():
+    def callback(request):
+        pass
+
+    with Loop() as loop:
+        with pytest.raises(ValueError):
+            loop.add_request_callback(callback, skip_if_busy=True)
+        with pytest.raises(ValueError):
+            loop.add_request_callback(callback, worker=True, max_concurrency=0)
+        loop.add_request_callback(callback, worker=True)
+        assert loop.request_callback_stats(callback).calls == 0
+        loop.remove_request_callback(callback)
+        with pytest.raises(ValueError):
+            loop.request_callback_stats(callback)
@@ -0,0 +1,34 @@
+from scicamera.sequence import FrameSequence
+
+MS = 1_000_000  # nanoseconds
+
+
+def test_dropped_frames_from_timestamps():
+    sequence = FrameSequence()
+    # 10ms frames, with jitter of under half a frame, then 1 and 3 frames lost
+    timestamps = [0, 10, 21, 29, 50, 60, 100]
+    dropped = [sequence.update(t * MS, 10000) for t in timestamps]
+    assert dropped == [0, 0, 0, 0, 1, 0, 3]
+    assert (sequence.frames, sequence.dropped) == (7, 4)
+    assert (sequence.gaps, sequence.max_gap) == (2, 3)
+    assert sequence.drop_rate == 4 / 11
+
+
+def test_dropped_frames_from_sequence_numbers():
+    sequence = FrameSequence()
+    # The sequence numbers are trusted over the timestamps
+    assert sequence.update(0, 10000, sequence=5) == 0
+    assert sequence.update(100 * MS, 10000, sequence=6) == 0
+    assert sequence.update(110 * MS, 10000, sequence=9) == 2
+    assert sequence.dropped == 2
+
+
+def test_restart_is_not_a_drop():
+    sequence = FrameSequence()
+    sequence.update(0, 10000)
+    sequence.restart()
+    assert sequence.update(5000 * MS, 10000) == 0
+    # Without a frame duration gaps can't be told from the timestamps
+    assert sequence.update(6000 * MS) == 0
+    assert sequence.frames == 3 and sequence.dropped == 0
+    assert FrameSequence().drop_rate == 0.0
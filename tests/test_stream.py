@@ -0,0 +1,98 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from scicamera.fake import FakeCamera
+from scicamera.stream import FrameStream
+from tests.helpers import Callbacks
+
+
+class Request:
+    """Just enough of a request to make a CameraFrame from."""
+
+    def __init__(self, index):
+        self.index = index
+        self.config = self.controls = self
+
+    def make_array(self, name):
+        return np.full(2, self.index)
+
+    def make_dict(self):
+        return {}
+
+    def get_metadata(self):
+        return {"index": self.index}
+
+
+def indices(frames):
+    return [frame.metadata["index"] for frame in frames]
+
+
+@pytest.mark.parametrize(
+    "policy, kept", [("drop_oldest", [3, 4, 5]), ("drop_newest", [0, 1, 2])]
+)
+def test_stream_drop_policies(policy, kept):
+    camera = Callbacks(Request)
+    with FrameStream(camera, maxsize=3, policy=policy) as stream:
+        camera.deliver(*range(6))
+        assert stream.qsize() == 3
+    assert camera.callbacks == []
+    assert indices(stream) == kept
+    assert (stream.received, stream.dropped) == (6, 3)
+
+
+def test_stream_block_policy():
+    camera = Callbacks(Request)
+    stream = FrameStream(camera, maxsize=1, policy="block")
+    producer = threading.Thread(target=camera.deliver, args=(0, 1, 2))
+    producer.start()
+    time.sleep(0.01)
+    assert producer.is_alive()  # held up until there is room
+
+    assert indices([next(stream), next(stream), next(stream)]) == [0, 1, 2]
+    producer.join(timeout=1)
+    assert stream.dropped == 0
+
+    # Closing releases a blocked producer
+    camera.deliver(3)
+    producer = threading.Thread(target=camera.deliver, args=(4,))
+    producer.start()
+    stream.close()
+    producer.join(timeout=1)
+    assert not producer.is_alive()
+    assert indices(stream) == [3]
+
+
+def test_stream_timeout_and_bad_arguments():
+    camera = Callbacks(Request)
+    with FrameStream(camera, timeout=0.01) as stream:
+        with pytest.raises(TimeoutError):
+            next(stream)
+    with pytest.raises(ValueError):
+        FrameStream(camera, policy="drop_all")
+    with pytest.raises(ValueError):
+        FrameStream(camera, maxsize=0)
+
+
+def test_fake_camera_stream():
+    with FakeCamera() as camera:
+        camera.start()
+        with camera.stream("main", maxsize=2, timeout=1) as stream:
+            frames = [next(stream) for _ in range(3)]
+        camera.stop()
+    assert frames[0].array.shape == (240, 320, 3)
+    assert stream.received >= 3
+
+
+def test_blocking_stream_closed_on_stop():
+    with FakeCamera() as camera:
+        camera.start()
+        stream = camera.stream("main", maxsize=1, policy="block", timeout=1)
+        # Nobody reads the stream, so the runloop blocks on it
+        while stream.received < 2:
+            time.sleep(0.01)
+        camera.stop()
+    assert len(list(stream)) == 1
+    assert camera._request_callbacks == []